@@ -1,3 +1,4 @@
+import concurrent.futures
 from pathlib import Path
 
 import pooch
@@ -247,5 +248,7 @@ def fetch_all():
         registry=registry,
         retry_if_failed=10,
     )
-    for key in registry:
-        datastore.fetch(key)
+    # Downloads are network bound, so fetch several files at once.  pooch
+    # skips files that are already present with a matching hash.
+    with concurrent.futures.ThreadPoolExecutor(max_workers=16) as executor:
+        list(executor.map(datastore.fetch, registry))
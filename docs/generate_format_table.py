@@ -1,3 +1,7 @@
+import concurrent.futures
+import functools
+import os
+import shelve
 from pathlib import Path
 
 from format_examples_datastore import EXAMPLES_FOLDER, fetch_all, format_examples
@@ -5,94 +9,186 @@ from format_examples_datastore import EXAMPLES_FOLDER, fetch_all, format_example
 import large_image
 
 TABLE_FILE = Path('./format_table.rst')
+# Probe results keyed by example file, to skip unchanged files on rebuild
+CACHE_FILE = Path(EXAMPLES_FOLDER, 'format_table_cache')
 NO_MULTIFRAME_SOURCES = ['deepzoom', 'openjpeg', 'openslide']
 
 
-def evaluate_examples():
-    large_image.tilesource.loadTileSources()
+@functools.lru_cache(maxsize=None)
+def _source_caps(tilesource):
+    """
+    Return the class-level capabilities of a tile source.
+
+    :param tilesource: a tile source class.
+    :returns: a tuple of (writeable, has associated images).
+    """
+    return (
+        hasattr(tilesource, 'addTile'),
+        tilesource.getAssociatedImagesList is not
+        large_image.tilesource.FileTileSource.getAssociatedImagesList,
+    )
+
+
+def _flatten_examples(format_examples):
+    """
+    Expand the format examples into one task per example file to probe.
+
+    :param format_examples: a list of formats, each with a list of examples.
+    :returns: a list of (name, long_name, reference, extensions, filename,
+        url, filepath) tuples for examples that aren't skipped.  The
+        filepath is a string so it isn't converted on every use.
+    """
+    return [
+        (
+            format_data.get('name'),
+            format_data.get('long_name'),
+            format_data.get('reference'),
+            format_data.get('extensions'),
+            example.get('filename'),
+            example.get('url'),
+            os.fspath(Path(EXAMPLES_FOLDER, example.get('filename'))),
+        )
+        for format_data in format_examples
+        for example in format_data.get('examples', [])
+        if not example.get('skip')
+    ]
+
+
+def _probe_example(task):
     available_tilesources = large_image.tilesource.AvailableTileSources
+    name, long_name, reference, extensions, filename, url, filepath = task
+    print(f'Evaluating {filename}. ')
     results = []
-    for format_data in format_examples:
-        name = format_data.get('name')
-        long_name = format_data.get('long_name')
-        reference = format_data.get('reference')
-        extensions = format_data.get('extensions')
-        for example in format_data.get('examples', []):
-            skip = example.get('skip')
-            if not skip:
-                filename = example.get('filename')
-                url = example.get('url')
-                filepath = Path(EXAMPLES_FOLDER, filename)
-                print(f'Evaluating {filename}. ')
-                for tilesource_name, readable in large_image.canReadList(filepath):
-                    tilesource = available_tilesources.get(tilesource_name)
-                    if readable and tilesource:
-                        try:
-                            s = tilesource(filepath)
-                            results.append(
-                                dict(
-                                    name=name,
-                                    long_name=long_name,
-                                    reference=reference,
-                                    extensions=extensions,
-                                    filename=filename,
-                                    url=url,
-                                    tilesource=tilesource_name,
-                                    multiframe=(
-                                        False if tilesource_name in NO_MULTIFRAME_SOURCES else
-                                        True if s.getMetadata().get('frames') is not None else
-                                        'Unknown'
-                                    ),
-                                    geospatial=hasattr(s, 'projection'),
-                                    write=hasattr(s, 'addTile'),
-                                    associated=(
-                                        tilesource.getAssociatedImagesList is not
-                                        large_image.tilesource.FileTileSource.getAssociatedImagesList
-                                    ),
-                                ),
-                            )
-                        except large_image.exceptions.TileSourceError:
-                            pass
+    for tilesource_name, readable in large_image.canReadList(filepath):
+        tilesource = available_tilesources.get(tilesource_name)
+        if readable and tilesource:
+            write, associated = _source_caps(tilesource)
+            # canRead has already opened this source and it is held in the
+            # source cache, so this is a cache hit rather than a second
+            # decode.  Sources can't be skipped based on class capabilities
+            # alone since geospatial and multiframe depend on the instance;
+            # combine_rows merges the rows that end up identical.
+            try:
+                s = tilesource(filepath)
+                results.append(
+                    dict(
+                        name=name,
+                        long_name=long_name,
+                        reference=reference,
+                        extensions=extensions,
+                        filename=filename,
+                        url=url,
+                        tilesource=tilesource_name,
+                        multiframe=(
+                            False if tilesource_name in NO_MULTIFRAME_SOURCES else
+                            True if s.getMetadata().get('frames') is not None else
+                            'Unknown'
+                        ),
+                        # projection is set per instance, not per class
+                        geospatial=hasattr(s, 'projection'),
+                        write=write,
+                        associated=associated,
+                    ),
+                )
+            except large_image.exceptions.TileSourceError:
+                pass
     return results
 
 
+def _example_cache_key(filename, present, sources_key):
+    """
+    Get a key for the cached probe results of an example file.
+
+    :param filename: the name of the example file.
+    :param present: a dictionary of directory entries of the files in the
+        examples folder, keyed by name.
+    :param sources_key: a string identifying the available tile sources.
+    :returns: a key that changes if the file, large_image, or the set of
+        tile sources changes, or None if the file isn't present.
+    """
+    if filename not in present:
+        return None
+    stat = present[filename].stat()
+    return f'{filename}:{stat.st_mtime}:{stat.st_size}:{large_image.__version__}:{sources_key}'
+
+
+def evaluate_examples():
+    # Load sources once before probing examples in parallel so the threads
+    # don't race to populate AvailableTileSources.
+    large_image.tilesource.loadTileSources()
+    sources_key = ','.join(sorted(large_image.tilesource.AvailableTileSources))
+    tasks = _flatten_examples(format_examples)
+    EXAMPLES_FOLDER.mkdir(parents=True, exist_ok=True)
+    # List the examples folder once rather than checking each file
+    with os.scandir(EXAMPLES_FOLDER) as entries:
+        present = {entry.name: entry for entry in entries if entry.is_file()}
+    keys = [_example_cache_key(task[4], present, sources_key) for task in tasks]
+    task_results = [None] * len(tasks)
+    # Only plain dictionaries are stored, so results from unchanged files can
+    # be reused across doc builds.  The shelf is only accessed from this
+    # thread.
+    with shelve.open(str(CACHE_FILE)) as cache:
+        for idx, key in enumerate(keys):
+            if key is not None and key in cache:
+                task_results[idx] = cache[key]
+        pending = [idx for idx, value in enumerate(task_results) if value is None]
+        # Probing is mostly file I/O and header decoding, so threads are
+        # enough.  Use map rather than as_completed so the table order is
+        # reproducible.
+        with concurrent.futures.ThreadPoolExecutor(
+                max_workers=min(32, (os.cpu_count() or 1) * 4)) as executor:
+            for idx, example_results in zip(pending, executor.map(
+                    _probe_example, [tasks[idx] for idx in pending])):
+                task_results[idx] = example_results
+                if keys[idx] is not None:
+                    cache[keys[idx]] = example_results
+        # Drop entries for files that have changed or are no longer examples
+        # so the shelf doesn't grow with each rebuild.
+        for key in set(cache.keys()).difference(keys):
+            del cache[key]
+    return [result for example_results in task_results for result in example_results]
+
+
+def _row_signature(result):
+    """
+    Get a hashable signature of every value of a result except its tile
+    source.  Results with the same signature are shown as one row.
+    """
+    return (
+        result['name'], result['long_name'], result['reference'],
+        tuple(result['extensions'] or ()), result['filename'], result['url'],
+        result['multiframe'], result['geospatial'], result['write'],
+        result['associated'],
+    )
+
+
 def combine_rows(results):
     # combine rows that only differ on tilesource
+    multiframe_files = {
+        result['filename'] for result in results if result['multiframe'] is True}
     table_rows = {}
+    # map the non-tilesource values of a row to its key in table_rows
+    row_keys = {}
+    rows_per_file = {}
     for result in results:
-        row_base_key = result.get('filename')
-        row_key_index = 0
-        row_key = f'{row_base_key}_{row_key_index}'
         # if this source has "maybe" for multiframe
         # and another source has True, change multiframe value to False
-        if (
-            isinstance(result['multiframe'], str) and
-            any(
-                r['filename'] == result['filename'] and
-                r['multiframe'] and isinstance(r['multiframe'], bool)
-                for r in results
-            )
-        ):
+        if isinstance(result['multiframe'], str) and result['filename'] in multiframe_files:
             result['multiframe'] = False
-        while row_key in table_rows:
-            if all(
-                value == table_rows[row_key][key]
-                for key, value in result.items()
-                if key != 'tilesource'
-            ):
-                if not isinstance(table_rows[row_key]['tilesource'], list):
-                    table_rows[row_key]['tilesource'] = [
-                        table_rows[row_key]['tilesource'],
-                    ]
+        signature = _row_signature(result)
+        row_key = row_keys.get(signature)
+        if row_key is not None:
+            if not isinstance(table_rows[row_key]['tilesource'], list):
                 table_rows[row_key]['tilesource'] = [
-                    *table_rows[row_key]['tilesource'],
-                    result['tilesource'],
+                    table_rows[row_key]['tilesource'],
                 ]
-                break
-            row_key_index += 1
-            row_key = f'{row_base_key}_{row_key_index}'
-        if row_key not in table_rows:
-            table_rows[row_key] = result
+            table_rows[row_key]['tilesource'].append(result['tilesource'])
+            continue
+        row_key_index = rows_per_file.get(result['filename'], 0)
+        rows_per_file[result['filename']] = row_key_index + 1
+        row_key = f'{result["filename"]}_{row_key_index}'
+        row_keys[signature] = row_key
+        table_rows[row_key] = result
     return table_rows
 
 
@@ -122,6 +218,43 @@ def get_extensions_list():
     ]
 
 
+def _format_name(value, row, row_key):
+    # include reference as link and long name as tooltip
+    reference_link = row.get('reference')
+    long_name = row.get('long_name')
+    raw_html = [
+        '.. raw:: html\n\n\t\t\t\t<p>',
+    ]
+    raw_html.append(f'<a href="{reference_link}"')
+    if long_name:
+        raw_html.append(f' title="{long_name}">{value}</a>')
+    else:
+        raw_html.append(f'>{value}</a>')
+    raw_html.append(f'\n\t\t\t\t<a class="reference internal" href="#{row_key}">')
+    raw_html.append('<span class="std std-ref">🔗</span></a>')
+    raw_html.append('</p>\n')
+    return ''.join(raw_html)
+
+
+def _format_extensions(value, row, row_key):
+    # format extensions with monospace font
+    return ', '.join([f'``{e}``' for e in value])
+
+
+def _format_tilesource(value, row, row_key):
+    # join tilesource lists with commas
+    return ', '.join(value) if isinstance(value, list) else value
+
+
+def _format_url(value, row, row_key):
+    # reformat example download link
+    return f'`Download <{value}>`__'
+
+
+def _format_plain(value, row, row_key):
+    return value
+
+
 def generate():
     fetch_all()
     results = evaluate_examples()
@@ -129,81 +262,42 @@ def generate():
 
     # generate RST-formatted table
     columns = [
-        dict(label='Format', key='name'),
-        dict(label='Extension(s)', key='extensions'),
-        dict(label='Tile Source', key='tilesource'),
-        dict(label='Multiframe', key='multiframe'),
-        dict(label='Geospatial', key='geospatial'),
-        dict(label='Writeable', key='write'),
-        dict(label='Associated Images', key='associated'),
-        dict(label='Example File', key='url'),
-    ]
-    lines = [
-        '.. list-table:: Common Formats',
-        '   :header-rows: 1',
-        '',
-    ]
-    for index, col in enumerate(columns):
-        label = col.get('label')
-        if index == 0:
-            lines.append(f'   * - {label}')
-        else:
-            lines.append(f'     - {label}')
-    for row_key, row in table_rows.items():
-        lines.append('')  # blank line for ref separation
-        lines.append(f'       .. _{row_key}:')
-        for index, col in enumerate(columns):
-            col_key = col.get('key')
-            col_value = row.get(col_key)
-            if col_key == 'extensions':
-                # format extensions with monospace font
-                col_value = ', '.join([f'``{e}``' for e in col_value])
-            elif col_key == 'name':
-                # include reference as link and long name as tooltip
-                reference_link = row.get('reference')
-                long_name = row.get('long_name')
-                raw_html = [
-                    '.. raw:: html\n\n\t\t\t\t<p>',
-                ]
-                raw_html.append(f'<a href="{reference_link}"')
-                if long_name:
-                    raw_html.append(f' title="{long_name}">{col_value}</a>')
-                else:
-                    raw_html.append(f'>{col_value}</a>')
-                raw_html.append(f'\n\t\t\t\t<a class="reference internal" href="#{row_key}">')
-                raw_html.append('<span class="std std-ref">🔗</span></a>')
-                raw_html.append('</p>\n')
-                col_value = ''.join(raw_html)
-            elif col_key == 'url':
-                # reformat example download link
-                col_value = (
-                    f'`Download <{col_value}>`__'
-                )
-            elif col_key == 'tilesource':
-                # join tilesource lists with commas
-                if isinstance(col_value, list):
-                    col_value = ', '.join(col_value)
-
-            if index == 0:
-                lines.append(f'   * - {col_value}')
-            else:
-                lines.append(f'     - {col_value}')
-
-    # Extensions and Mime Types
-    lines = [
-        'For a list of known mime types, see :ref:`mime_types_list`.',
-        'For a list of known extensions, see :ref:`extensions_list`.',
-        '',
-        *lines,
-        '',
-        *get_mimetypes_list(),
-        '',
-        *get_extensions_list(),
-        '',
+        dict(label='Format', key='name', format=_format_name),
+        dict(label='Extension(s)', key='extensions', format=_format_extensions),
+        dict(label='Tile Source', key='tilesource', format=_format_tilesource),
+        dict(label='Multiframe', key='multiframe', format=_format_plain),
+        dict(label='Geospatial', key='geospatial', format=_format_plain),
+        dict(label='Writeable', key='write', format=_format_plain),
+        dict(label='Associated Images', key='associated', format=_format_plain),
+        dict(label='Example File', key='url', format=_format_url),
     ]
+    # The first cell of each row starts a new list item
+    prefixes = ['   * - '] + ['     - '] * (len(columns) - 1)
+    # Write the header row once; it doesn't depend on the table contents
+    header = ''.join(
+        f'{prefix}{col["label"]}\n' for prefix, col in zip(prefixes, columns))
+    cells = [(prefix, col['key'], col['format']) for prefix, col in zip(prefixes, columns)]
 
-    with open(TABLE_FILE, 'w') as f:
-        f.write('\n'.join(lines))
+    with open(TABLE_FILE, 'w', buffering=1 << 20) as f:
+        # Extensions and Mime Types
+        f.write('For a list of known mime types, see :ref:`mime_types_list`.\n')
+        f.write('For a list of known extensions, see :ref:`extensions_list`.\n')
+        f.write('\n')
+        f.write('.. list-table:: Common Formats\n')
+        f.write('   :header-rows: 1\n')
+        f.write('\n')
+        f.write(header)
+        for row_key, row in table_rows.items():
+            f.write('\n')  # blank line for ref separation
+            f.write(f'       .. _{row_key}:\n')
+            for prefix, col_key, formatter in cells:
+                f.write(f'{prefix}{formatter(row.get(col_key), row, row_key)}\n')
+        f.write('\n')
+        for line in get_mimetypes_list():
+            f.write(f'{line}\n')
+        f.write('\n')
+        for line in get_extensions_list():
+            f.write(f'{line}\n')
     print('Wrote format table at', str(TABLE_FILE))
 
 
@@ -14,6 +14,8 @@
 #  limitations under the License.
 #############################################################################
 
+import concurrent.futures
+import copy
 import io
 import json
 import pickle
@@ -37,6 +39,27 @@ from large_image.exceptions import TileGeneralError, TileSourceError
 
 from .. import constants, girder_tilesource
 
+# Tiles that are currently being generated, so that concurrent requests for
+# the same tile can share the result rather than each generating it.
+_pendingTiles = {}
+_pendingTilesLock = threading.Lock()
+# Seconds to wait for another request to generate a tile before generating it
+# independently.
+_pendingTileTimeout = 30
+
+
+def _copyException(exc):
+    """
+    Make a copy of an exception of the same type and with the same arguments.
+
+    :param exc: the exception to copy.
+    :returns: a new exception.
+    """
+    try:
+        return copy.copy(exc)
+    except Exception:
+        return TileGeneralError(str(exc))
+
 
 class ImageItem(Item):
     # We try these sources in this order.  The first entry is the fallback for
@@ -61,21 +84,21 @@ class ImageItem(Item):
                         createJob=True, notify=False, localJob=None, **kwargs):
         logger.info('createImageItem called on item %s (%s)', item['_id'], item['name'])
         # Using setdefault ensures that 'largeImage' is in the item
-        if 'fileId' in item.setdefault('largeImage', {}):
+        largeImage = item.setdefault('largeImage', {})
+        if 'fileId' in largeImage:
             msg = 'Item already has largeImage set.'
             raise TileGeneralError(msg)
         if fileObj['itemId'] != item['_id']:
             msg = 'The provided file must be in the provided item.'
             raise TileGeneralError(msg)
-        if (item['largeImage'].get('expected') is True and
-                'jobId' in item['largeImage']):
+        if largeImage.get('expected') is True and 'jobId' in largeImage:
             msg = 'Item is scheduled to generate a largeImage.'
             raise TileGeneralError(msg)
 
-        item['largeImage'].pop('expected', None)
-        item['largeImage'].pop('sourceName', None)
+        largeImage.pop('expected', None)
+        largeImage.pop('sourceName', None)
 
-        item['largeImage']['fileId'] = fileObj['_id']
+        largeImage['fileId'] = fileObj['_id']
         job = None
         logger.debug(
             'createImageItem checking if item %s (%s) can be used directly',
@@ -85,7 +108,7 @@ class ImageItem(Item):
             logger.info(
                 'createImageItem using source %s for item %s (%s)',
                 sourceName, item['_id'], item['name'])
-            item['largeImage']['sourceName'] = sourceName
+            largeImage['sourceName'] = sourceName
         if not sourceName or createJob == 'always':
             if not createJob:
                 logger.info(
@@ -97,15 +120,15 @@ class ImageItem(Item):
                 'createImageItem creating a job to generate a largeImage for item %s (%s)',
                 item['_id'], item['name'])
             # No source was successful
-            del item['largeImage']['fileId']
+            del largeImage['fileId']
             if not localJob:
                 job = self._createLargeImageJob(item, fileObj, user, token, **kwargs)
             else:
                 job = self._createLargeImageLocalJob(item, fileObj, user, **kwargs)
-            item['largeImage']['expected'] = True
-            item['largeImage']['notify'] = notify
-            item['largeImage']['originalId'] = fileObj['_id']
-            item['largeImage']['jobId'] = job['_id']
+            largeImage['expected'] = True
+            largeImage['notify'] = notify
+            largeImage['originalId'] = fileObj['_id']
+            largeImage['jobId'] = job['_id']
             logger.debug(
                 'createImageItem created a job to generate a largeImage for item %s (%s)',
                 item['_id'], item['name'])
@@ -268,6 +291,43 @@ class ImageItem(Item):
         return result
 
     def getTile(self, item, x, y, z, mayRedirect=False, **kwargs):
+        # Map views often request the same uncached tile from several clients
+        # at once; only the first request generates it.
+        key = strhash(str(item['_id']), str(item.get('updated', item.get('created'))),
+                      x, y, z, mayRedirect=mayRedirect, **kwargs)
+        with _pendingTilesLock:
+            future = _pendingTiles.get(key)
+            if future is None:
+                future = _pendingTiles[key] = concurrent.futures.Future()
+            else:
+                key = None
+        if key is None:
+            try:
+                return future.result(timeout=_pendingTileTimeout)
+            except (concurrent.futures.TimeoutError, concurrent.futures.CancelledError):
+                # Don't let a slow, hung, or interrupted request hold this one
+                # indefinitely
+                return self._getTile(item, x, y, z, mayRedirect=mayRedirect, **kwargs)
+            except Exception as exc:
+                # The exception is shared by all waiting requests, so raise a
+                # copy rather than adding this thread's traceback to it
+                raise _copyException(exc) from exc
+        try:
+            result = self._getTile(item, x, y, z, mayRedirect=mayRedirect, **kwargs)
+        except Exception as exc:
+            future.set_exception(exc)
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            if not future.done():
+                # Interrupted; waiting requests will generate the tile
+                future.cancel()
+            with _pendingTilesLock:
+                del _pendingTiles[key]
+
+    def _getTile(self, item, x, y, z, mayRedirect=False, **kwargs):
         tileSource = self._loadTileSource(item, **kwargs)
         imageParams = {}
         if 'frame' in kwargs:
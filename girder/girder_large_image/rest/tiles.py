@@ -123,6 +123,17 @@ def _pickleParams(params):
     return int(pickl) or 4 if pickl.isdigit() else 4
 
 
+def _isTilePosition(value):
+    """
+    Check if a value is a string of ASCII digits, and therefore a
+    non-negative integer.
+
+    :param value: a tile position, usually from the request path.
+    :returns: True if the value is a string of ASCII digits.
+    """
+    return isinstance(value, str) and value.isascii() and value.isdigit()
+
+
 def _pickleOutput(data, protocol):
     """
     Pickle some data using a specific protocol and return the pickled data
@@ -232,7 +243,7 @@ class TilesItemResource(ItemResource):
             params['_concurrency'] = params.pop('concurrent')
         largeImageFileId = params.get('fileId')
         if largeImageFileId is None:
-            files = list(Item().childFiles(item=item, limit=2))
+            files = list(Item().childFiles(item=item, limit=2, fields={'_id': True}))
             if len(files) == 1:
                 largeImageFileId = str(files[0]['_id'])
         if not largeImageFileId:
@@ -300,7 +311,7 @@ class TilesItemResource(ItemResource):
             params['_concurrency'] = params.pop('concurrent')
         largeImageFileId = params.get('fileId')
         if largeImageFileId is None:
-            files = list(Item().childFiles(item=item, limit=2))
+            files = list(Item().childFiles(item=item, limit=2, fields={'_id': True}))
             if len(files) == 1:
                 largeImageFileId = str(files[0]['_id'])
         if not largeImageFileId:
@@ -357,26 +368,31 @@ class TilesItemResource(ItemResource):
         if keepUnknownParams:
             results = dict(params)
         for entry in typeList:
-            key, dataType, outkey1, outkey2 = (list(entry) + [None] * 2)[:4]
-            if key in params:
-                if dataType == 'boolOrInt':
-                    dataType = bool if str(params[key]).lower() in (
-                        'true', 'false', 'on', 'off', 'yes', 'no') else int
-                try:
-                    if dataType is bool:
-                        results[key] = str(params[key]).lower() in (
-                            'true', 'on', 'yes', '1')
-                    else:
-                        results[key] = dataType(params[key])
-                except ValueError:
-                    raise RestException(
-                        '"%s" parameter is an incorrect type.' % key)
-                if outkey1 is not None:
-                    if outkey2 is not None:
-                        results.setdefault(outkey1, {})[outkey2] = results[key]
-                    else:
-                        results[outkey1] = results[key]
-                    del results[key]
+            # Most listed parameters are absent from any given request, so
+            # check before unpacking the entry
+            key = entry[0]
+            if key not in params:
+                continue
+            dataType = entry[1]
+            if dataType == 'boolOrInt':
+                dataType = bool if str(params[key]).lower() in (
+                    'true', 'false', 'on', 'off', 'yes', 'no') else int
+            try:
+                if dataType is bool:
+                    value = str(params[key]).lower() in ('true', 'on', 'yes', '1')
+                else:
+                    value = dataType(params[key])
+            except ValueError:
+                raise RestException(
+                    '"%s" parameter is an incorrect type.' % key)
+            if len(entry) > 2:
+                results.pop(key, None)
+                if len(entry) > 3:
+                    results.setdefault(entry[2], {})[entry[3]] = value
+                else:
+                    results[entry[2]] = value
+            else:
+                results[key] = value
         return results
 
     def _getTilesInfo(self, item, imageArgs):
@@ -514,15 +530,20 @@ class TilesItemResource(ItemResource):
             allow return a response which may be a redirect.
         :return: a function that returns the raw image data.
         """
-        try:
+        # Path parameters are almost always plain digit strings, which can be
+        # converted without the exception handling or sign check
+        if _isTilePosition(x) and _isTilePosition(y) and _isTilePosition(z):
             x, y, z = int(x), int(y), int(z)
-        except ValueError:
-            msg = 'x, y, and z must be integers'
-            raise RestException(msg, code=400)
-        if x < 0 or y < 0 or z < 0:
-            msg = 'x, y, and z must be positive integers'
-            raise RestException(msg,
-                                code=400)
+        else:
+            try:
+                x, y, z = int(x), int(y), int(z)
+            except ValueError:
+                msg = 'x, y, and z must be integers'
+                raise RestException(msg, code=400)
+            if x < 0 or y < 0 or z < 0:
+                msg = 'x, y, and z must be positive integers'
+                raise RestException(msg,
+                                    code=400)
         result = self.imageItemModel._tileFromHash(
             item, x, y, z, mayRedirect=mayRedirect, **imageArgs)
         if result is not None:
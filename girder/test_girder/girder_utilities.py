@@ -1,7 +1,9 @@
+import functools
 import io
 import os
 from test.datastore import datastore
-from test.utilities import BigTIFFHeader, JFIFHeader, JPEGHeader, PNGHeader, TIFFHeader  # noqa
+from test.utilities import (BigTIFFHeader, JFIFHeader, JPEGHeader,  # noqa
+                            PNGHeader, TIFFHeader, pngSize)
 
 try:
     from girder.models.folder import Folder
@@ -10,6 +12,9 @@ except ImportError:
     # Make it easier to test without girder
     pass
 
+TEST_FILES_DIR = os.path.join(
+    os.path.dirname(os.path.realpath(__file__)), '..', '..', 'test', 'test_files')
+
 
 def namedFolder(user, folderName='Public'):
     return Folder().find({
@@ -28,14 +33,25 @@ def uploadFile(filePath, user, assetstore, folderName='Public', name=None):
     return file
 
 
+@functools.lru_cache(maxsize=None)
+def fetchExternalFile(hashPath):
+    """
+    Fetch a file from the datastore.  Fetching verifies the file's hash, so
+    only do this once per file per test session.
+
+    :param hashPath: the name of the file in the datastore registry.
+    :returns: the local path of the file.
+    """
+    return datastore.fetch(hashPath)
+
+
 def uploadExternalFile(hashPath, user, assetstore, folderName='Public', name=None):
-    imagePath = datastore.fetch(hashPath)
+    imagePath = fetchExternalFile(hashPath)
     return uploadFile(imagePath, user=user, assetstore=assetstore, folderName=folderName, name=name)
 
 
 def uploadTestFile(fileName, user, assetstore, folderName='Public', name=None):
-    testDir = os.path.dirname(os.path.realpath(__file__))
-    imagePath = os.path.join(testDir, '..', '..', 'test', 'test_files', fileName)
+    imagePath = os.path.join(TEST_FILES_DIR, fileName)
     return uploadFile(imagePath, user=user, assetstore=assetstore, folderName=folderName, name=None)
 
 
@@ -68,3 +84,23 @@ def getBody(response, text=True):
         data += chunk
 
     return data
+
+
+def peekBody(response, length):
+    """
+    Returns the first bytes of a binary response body without collecting the
+    rest of the body.
+
+    :param response: The response object from the server.
+    :param length: the number of bytes to return.
+    """
+    data = b''
+    for chunk in response.body:
+        if not isinstance(chunk, bytes):
+            chunk = chunk.encode('utf8')
+        data += chunk
+        if len(data) >= length:
+            break
+    if hasattr(response.body, 'close'):
+        response.body.close()
+    return data[:length]
@@ -17,13 +17,14 @@
 import copy
 import datetime
 import enum
+import itertools
 import re
 import threading
 import time
 
 import cherrypy
+import fastjsonschema
 import jsonschema
-import numpy as np
 from bson import ObjectId
 from girder_large_image import constants
 from girder_large_image.models.image_item import ImageItem
@@ -41,8 +42,33 @@ from girder.models.user import User
 from ..utils import AnnotationGeoJSON, GeoJSONAnnotation, isGeoJSON
 from .annotationelement import Annotationelement
 
-# Some arrays longer than this are validated using numpy rather than jsonschema
-VALIDATE_ARRAY_LENGTH = 1000
+# Some arrays longer than this are validated by checking the types of their
+# entries rather than with the schema; only this many entries are checked
+# against the schema.  The type check is around three times faster per point
+# than schema validation.
+VALIDATE_ARRAY_LENGTH = 100
+
+
+def _isNumberArray(value, width=None, types=(int, float)):
+    """
+    Check if a list contains only numbers or, if a width is specified, only
+    lists of exactly that many numbers.  This is a fast, strict check that
+    avoids per-entry schema validation of long arrays.  Booleans, strings,
+    None, and other values are not numbers.
+
+    :param value: the list to check.
+    :param width: if not None, the required length of each entry.
+    :param types: the exact types allowed for each number.
+    :returns: True if the list matches.
+    """
+    try:
+        if width is not None:
+            if set(map(len, value)) != {width}:
+                return False
+            value = itertools.chain.from_iterable(value)
+        return set(map(type, value)) <= set(types)
+    except TypeError:
+        return False
 
 
 def extendSchema(base, add):
@@ -615,6 +641,20 @@ class Annotation(AccessControlledModel):
         AnnotationSchema.annotationSchema)
     validatorAnnotationElement = jsonschema.Draft6Validator(
         AnnotationSchema.annotationElementSchema)
+    # Code-generated validators are much faster than the jsonschema ones and
+    # are used when saving annotations.  The schemas have no defaults, so
+    # these don't modify the document.
+    validateAnnotationSchema = staticmethod(fastjsonschema.compile(
+        AnnotationSchema.annotationSchema, use_default=False))
+    validateAnnotationElementSchema = staticmethod(fastjsonschema.compile(
+        AnnotationSchema.annotationElementSchema, use_default=False))
+    # Each element schema allows a single type, so an element only needs to
+    # be checked against the schema for its type rather than trying each
+    # schema in turn.
+    validateElementSchemaByType = {
+        schema['properties']['type']['enum'][0]: fastjsonschema.compile(
+            schema, use_default=False)
+        for schema in AnnotationSchema.annotationElementSchema['anyOf']}
     idRegex = re.compile('^[0-9a-f]{24}$')
     numberInstance = (int, float)
 
@@ -682,13 +722,15 @@ class Annotation(AccessControlledModel):
         :param event: the event with the item information.
         """
         item = event.info
+        if self._historyEnabled:
+            # just mark the annotations as inactive
+            self.update({'itemId': item['_id']}, {'$set': {'_active': False}})
+            return
+        # Remove annotations individually so that the remove events and
+        # notifications are sent for each
         annotations = Annotation().find({'itemId': item['_id']})
         for annotation in annotations:
-            if self._historyEnabled:
-                # just mark the annotations as inactive
-                self.update({'_id': annotation['_id']}, {'$set': {'_active': False}})
-            else:
-                Annotation().remove(annotation)
+            Annotation().remove(annotation)
 
     def _prepareCopyItem(self, event):
         # check if this copy should include annotations
@@ -857,7 +899,9 @@ class Annotation(AccessControlledModel):
             for retry in range(maxRetries):
                 Annotationelement().getElements(
                     annotation, region)
+                # Annotations saved with no elements don't need a recheck
                 if (len(annotation.get('annotation', {}).get('elements')) or
+                        annotation.get('_elementCount') == 0 or
                         retry + 1 == maxRetries):
                     break
                 recheck = super().load(id, *args, **kwargs)
@@ -903,6 +947,18 @@ class Annotation(AccessControlledModel):
             expires=datetime.datetime.now(datetime.timezone.utc) + datetime.timedelta(seconds=1))
         return result
 
+    def _withoutElements(self, doc):
+        """
+        Get a shallow copy of an annotation document without its elements.
+        The elements are stored separately, so this is what is written to
+        the annotation collection.  The original document is not modified.
+
+        :param doc: the annotation document.
+        :returns: a copy of the document without annotation elements.
+        """
+        annot = {k: v for k, v in doc['annotation'].items() if k != 'elements'}
+        return {**doc, 'annotation': annot}
+
     def save(self, annotation, *args, **kwargs):
         """
         When saving an annotation, override the collection insert_one and
@@ -935,41 +991,36 @@ class Annotation(AccessControlledModel):
             # don't want to trust that the input _version has not been altered
             # or is present.
             oldversion = self.collection.find_one(
-                {'_id': annotation['_id']}).get('_version')
+                {'_id': annotation['_id']}, {'_version': True}).get('_version')
         annotation['_version'] = version
+        # Record how many elements are stored with this version
+        annotation['_elementCount'] = len(annotation['annotation'].get('elements') or [])
         _elementQuery = annotation.pop('_elementQuery', None)
         annotation.pop('_active', None)
         annotation.pop('_annotationId', None)
 
         def replaceElements(query, doc, *args, **kwargs):
             Annotationelement().updateElements(doc)
-            elements = doc['annotation'].pop('elements', None)
             if self._historyEnabled:
                 oldAnnotation = self.collection.find_one(query)
                 if oldAnnotation:
                     oldAnnotation['_annotationId'] = oldAnnotation.pop('_id')
                     oldAnnotation['_active'] = False
                     insert_one(oldAnnotation)
-            ret = replace_one(query, doc, *args, **kwargs)
-            if elements:
-                doc['annotation']['elements'] = elements
+            ret = replace_one(query, self._withoutElements(doc), *args, **kwargs)
             if not self._historyEnabled:
                 Annotationelement().removeOldElements(doc, oldversion)
             return ret
 
         def insertElements(doc, *args, **kwargs):
             # When creating an annotation, store the elements first, then store
-            # the annotation without elements, then restore the elements.
+            # the annotation without elements.
             doc.setdefault('_id', ObjectId())
             if doc['annotation'].get('elements') is not None:
                 Annotationelement().updateElements(doc)
             # If we are inserting, we shouldn't have any old elements, so don't
             # bother removing them.
-            elements = doc['annotation'].pop('elements', None)
-            ret = insert_one(doc, *args, **kwargs)
-            if elements is not None:
-                doc['annotation']['elements'] = elements
-            return ret
+            return insert_one(self._withoutElements(doc), *args, **kwargs)
 
         with self._writeLock:
             self.collection.replace_one = replaceElements
@@ -1084,6 +1135,20 @@ class Annotation(AccessControlledModel):
         # Either a number or the dictionary or list comparisons passed
         return True
 
+    def _validateElementSchema(self, element):
+        """
+        Validate an annotation element against the schema for its type.
+        Elements without a known type are checked against the full element
+        schema.
+
+        :param element: the element to validate.
+        """
+        elementType = element.get('type')
+        validator = self.validateElementSchemaByType.get(
+            elementType if isinstance(elementType, str) else None,
+            self.validateAnnotationElementSchema)
+        validator(element)
+
     def validate(self, doc):  # noqa
         startTime = lastTime = time.time()
         try:
@@ -1096,9 +1161,10 @@ class Annotation(AccessControlledModel):
             annot = doc.get('annotation')
             elements = annot.get('elements', [])
             annot['elements'] = []
-            self.validatorAnnotation.validate(annot)
+            self.validateAnnotationSchema(annot)
             lastValidatedElement = None
             lastValidatedElement2 = None
+            elementIds = set()
             for idx, element in enumerate(elements):
                 # Discard element keys beginning with _
                 for key in list(element):
@@ -1106,52 +1172,53 @@ class Annotation(AccessControlledModel):
                         del element[key]
                 if isinstance(element.get('id'), ObjectId):
                     element['id'] = str(element['id'])
-                # Handle elements with large arrays by checking that a
-                # conversion to a numpy array works
+                # Handle elements with large arrays by checking the types of
+                # their entries; if that check fails, the whole array is
+                # validated against the schema
                 keys = {}
                 if len(element.get('points', element.get('values', []))) > VALIDATE_ARRAY_LENGTH:
                     key = 'points' if 'points' in element else 'values'
-                    try:
-                        # Check if the entire array converts in an obvious
-                        # manner
-                        np.array(element[key], dtype=float)
+                    if key == 'points':
+                        matches = _isNumberArray(
+                            element[key], 4 if element.get('type') == 'heatmap' else 3)
+                    else:
+                        matches = _isNumberArray(
+                            element[key],
+                            types=(int, ) if element.get('type') == 'pixelmap' else (int, float))
+                    if matches:
                         keys[key] = element[key]
                         element[key] = element[key][:VALIDATE_ARRAY_LENGTH]
-                    except Exception:
-                        pass
                 if any(len(h) > VALIDATE_ARRAY_LENGTH for h in element.get('holes', [])):
-                    key = 'holes'
-                    try:
-                        for h in element['holes']:
-                            np.array(h, dtype=float)
-                        keys[key] = element[key]
-                        element[key] = []
-                    except Exception:
-                        pass
+                    if all(len(h) >= 3 and _isNumberArray(h, 3) for h in element['holes']):
+                        keys['holes'] = element['holes']
+                        element['holes'] = []
                 try:
                     if (not self._similarElementStructure(element, lastValidatedElement) and
                             not self._similarElementStructure(element, lastValidatedElement2)):
-                        self.validatorAnnotationElement.validate(element)
+                        self._validateElementSchema(element)
                         lastValidatedElement2 = lastValidatedElement
                         lastValidatedElement = element
                 except TypeError:
-                    self.validatorAnnotationElement.validate(element)
+                    self._validateElementSchema(element)
                 if keys:
                     element.update(keys)
+                # Validated ids are strings, so they can be checked for
+                # uniqueness as we go
+                if 'id' in element:
+                    if element['id'] in elementIds:
+                        annot['elements'] = elements
+                        msg = 'Annotation Element IDs are not unique'
+                        raise ValidationException(msg)
+                    elementIds.add(element['id'])
                 if time.time() - lastTime > 10:
                     logger.info('Validated %s of %d elements in %5.3fs',
                                 idx + 1, len(elements), time.time() - startTime)
                     lastTime = time.time()
             annot['elements'] = elements
-        except jsonschema.ValidationError as exp:
+        except fastjsonschema.JsonSchemaException as exp:
             raise ValidationException(exp)
         if time.time() - startTime > 10:
             logger.info('Validated in %5.3fs' % (time.time() - startTime))
-        elementIds = [entry['id'] for entry in
-                      doc['annotation'].get('elements', []) if 'id' in entry]
-        if len(set(elementIds)) != len(elementIds):
-            msg = 'Annotation Element IDs are not unique'
-            raise ValidationException(msg)
         return doc
 
     def versionList(self, annotationId, user=None, limit=0, offset=0,
@@ -52,6 +52,7 @@ setup(
         'Programming Language :: Python :: 3.13',
     ],
     install_requires=[
+        'fastjsonschema',
         'jsonschema>=2.5.1',
         f'girder-large-image{limit_version}',
         'orjson',
@@ -8,6 +8,9 @@ except ImportError:
     # Make it easier to test without girder
     pass
 
+TEST_FILES_DIR = os.path.join(
+    os.path.dirname(os.path.realpath(__file__)), '..', '..', 'test', 'test_files')
+
 
 def namedFolder(user, folderName='Public'):
     return Folder().find({
@@ -32,8 +35,7 @@ def uploadExternalFile(hashPath, user, assetstore, folderName='Public', name=Non
 
 
 def uploadTestFile(fileName, user, assetstore, folderName='Public', name=None):
-    testDir = os.path.dirname(os.path.realpath(__file__))
-    imagePath = os.path.join(testDir, '..', '..', 'test', 'test_files', fileName)
+    imagePath = os.path.join(TEST_FILES_DIR, fileName)
     return uploadFile(imagePath, user=user, assetstore=assetstore, folderName=folderName, name=None)
 
 
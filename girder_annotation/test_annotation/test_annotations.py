@@ -162,10 +162,12 @@ class TestLargeImageAnnotation:
         loaded = Annotation().load(annot['_id'], user=admin)
         assert (loaded['annotation']['elements'][0]['center'] ==
                 annot['annotation']['elements'][0]['center'])
+        assert loaded['_elementCount'] == len(sampleAnnotation['elements'])
 
         annot0 = Annotation().createAnnotation(item, admin, sampleAnnotationEmpty)
         loaded = Annotation().load(annot0['_id'], user=admin)
         assert len(loaded['annotation']['elements']) == 0
+        assert loaded['_elementCount'] == 0
 
     def testSave(self, admin):
         publicFolder = utilities.namedFolder(admin, 'Public')
@@ -261,6 +263,37 @@ class TestLargeImageAnnotation:
         annot['elements'][1]['id'] = ObjectId('012345678901234567890124')
         assert Annotation().validate(doc) is not None
 
+    @pytest.mark.parametrize('badValue', ['1', True, None])
+    def testValidateLongArrays(self, db, badValue):
+        numPoints = annotation.VALIDATE_ARRAY_LENGTH + 50
+        points = [[float(idx), float(idx % 7), 0] for idx in range(numPoints)]
+        doc = {'annotation': {'name': 'long', 'elements': [
+            {'type': 'polyline', 'points': copy.deepcopy(points)}]}}
+        assert Annotation().validate(doc) is not None
+        assert len(doc['annotation']['elements'][0]['points']) == numPoints
+        # Invalid values past the schema-checked prefix are still rejected
+        doc['annotation']['elements'][0]['points'][-1][1] = badValue
+        with pytest.raises(ValidationException):
+            Annotation().validate(doc)
+        doc['annotation']['elements'][0]['points'] = copy.deepcopy(points)
+        doc['annotation']['elements'][0]['points'][-1].append(0)
+        with pytest.raises(ValidationException):
+            Annotation().validate(doc)
+        doc['annotation']['elements'] = [{
+            'type': 'polyline', 'closed': True, 'points': points[:4],
+            'holes': [copy.deepcopy(points)]}]
+        assert Annotation().validate(doc) is not None
+        doc['annotation']['elements'][0]['holes'][0][-1][0] = badValue
+        with pytest.raises(ValidationException):
+            Annotation().validate(doc)
+        doc['annotation']['elements'] = [{
+            'type': 'griddata', 'gridWidth': 10,
+            'values': [float(idx) for idx in range(numPoints)]}]
+        assert Annotation().validate(doc) is not None
+        doc['annotation']['elements'][0]['values'][-1] = badValue
+        with pytest.raises(ValidationException):
+            Annotation().validate(doc)
+
     def testVersionList(self, db, user, admin):
         privateFolder = utilities.namedFolder(admin, 'Private')
         # Test without history
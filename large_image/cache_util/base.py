@@ -1,13 +1,76 @@
+import collections
 import hashlib
 import threading
 import time
-from typing import Any, Callable, Dict, Optional, Tuple, TypeVar
+from typing import Any, Callable, Dict, Iterable, Optional, Tuple, TypeVar
 
 import cachetools
 
 _VT = TypeVar('_VT')
 
 
+class OrderedLRUCache(cachetools.Cache):
+    """
+    A least-recently-used cache with unit-sized items backed by a single
+    OrderedDict.  This behaves like cachetools.LRUCache, but a cache hit is
+    a dictionary lookup and a move_to_end, both of which are done in C, so
+    it is cheaper for the in-process caches that are checked on every tile
+    and tile source access.
+    """
+
+    def __init__(self, maxsize: float) -> None:
+        super().__init__(maxsize=maxsize)
+        self._items: 'collections.OrderedDict[Any, Any]' = collections.OrderedDict()
+
+    def __repr__(self) -> str:
+        return '%s(%r, maxsize=%r, currsize=%r)' % (
+            self.__class__.__name__, list(self._items.items()),
+            self.maxsize, self.currsize)
+
+    def __getitem__(self, key):
+        value = self._items[key]
+        self._items.move_to_end(key)
+        return value
+
+    def __setitem__(self, key, value) -> None:
+        items = self._items
+        items[key] = value
+        items.move_to_end(key)
+        while len(items) > self.maxsize:
+            items.popitem(last=False)
+
+    def __delitem__(self, key) -> None:
+        del self._items[key]
+
+    def __contains__(self, key) -> bool:
+        return key in self._items
+
+    def __iter__(self):
+        return iter(self._items)
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def popitem(self) -> Tuple[Any, Any]:
+        """
+        Remove and return the least recently used item.
+
+        :returns: a tuple of the key and value.
+        """
+        try:
+            return self._items.popitem(last=False)
+        except KeyError:
+            msg = '%s is empty' % self.__class__.__name__
+            raise KeyError(msg) from None
+
+    def clear(self) -> None:
+        self._items.clear()
+
+    @property
+    def currsize(self) -> int:
+        return len(self._items)
+
+
 class BaseCache(cachetools.Cache):
     """Base interface to cachetools.Cache for use with large-image."""
 
@@ -65,6 +128,23 @@ class BaseCache(cachetools.Cache):
         # hashedKey = self._hashKey(key)
         raise NotImplementedError
 
+    def getMany(self, keys: Iterable[str]) -> Dict[str, Any]:
+        """
+        Get multiple values from the cache.  Subclasses can override this to
+        fetch all of the values in a single request to the backing store.
+
+        :param keys: an iterable of keys to fetch.
+        :returns: a dictionary of the keys that are in the cache and their
+            values.  Keys that are not in the cache are omitted.
+        """
+        result = {}
+        for key in keys:
+            try:
+                result[key] = self[key]
+            except KeyError:
+                pass
+        return result
+
     @property
     def curritems(self) -> int:
         raise NotImplementedError
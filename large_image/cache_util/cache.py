@@ -124,11 +124,12 @@ def methodcache(key: Optional[Callable] = None) -> Callable:  # noqa
 class LruCacheMetaclass(type):
     namedCaches: Dict[str, Any] = {}
     classCaches: Dict[type, Any] = {}
+    _lruCache: Tuple[Any, Any]
 
     def __new__(mcs, name, bases, namespace, **kwargs):
-        # Get metaclass parameters by finding and removing them from the class
-        # namespace (necessary for Python 2), or preferentially as metaclass
-        # arguments (only in Python 3).
+        # Get metaclass parameters from the class keyword arguments or, as
+        # many classes define them, from class attributes.  Keyword arguments
+        # take precedence.
         cacheName = namespace.get('cacheName', None)
         cacheName = kwargs.get('cacheName', cacheName)
 
@@ -167,12 +168,11 @@ class LruCacheMetaclass(type):
         else:
             (cache, cacheLock) = LruCacheMetaclass.namedCaches[cacheName]
 
-        # Don't store the cache in cls.__dict__, because we don't want it to be
-        # part of the attribute lookup hierarchy
-        # TODO: consider putting it in cls.__dict__, to inspect statistics
-        # cls is hashable though, so use it to lookup the cache, in case an
-        # identically-named class gets redefined
-        LruCacheMetaclass.classCaches[cls] = (cache, cacheLock)
+        # Every class made with this metaclass sets its own _lruCache, so a
+        # subclass never uses its parent's cache by inheritance.  Reading the
+        # attribute is cheaper than hashing the class to look it up in
+        # classCaches, which is kept for introspection.
+        cls._lruCache = LruCacheMetaclass.classCaches[cls] = (cache, cacheLock)
 
         return cls
 
@@ -189,13 +189,33 @@ class LruCacheMetaclass(type):
                 subkwargs['style'] = getattr(cls, '_unstyledStyle', None)
                 instance._unstyledInstance = subresult = cls(*args, **subkwargs)
             return instance
-        cache, cacheLock = LruCacheMetaclass.classCaches[cls]
+        cache, cacheLock = cls._lruCache
 
+        # The in-process cache only needs a hashable key, so use a tuple
+        # rather than building a string on every call.  The string form is
+        # only needed for _classkey, which is used in tile cache keys, and is
+        # only made when a new instance is created.
         if hasattr(cls, 'getLRUHash'):
-            key = cls.getLRUHash(*args, **kwargs)
+            lruHash = cls.getLRUHash(*args, **kwargs)
         else:
-            key = strhash(args[0], kwargs)
-        key = cls.__name__ + ' ' + key
+            lruHash = (args[0], tuple(sorted(kwargs.items())))
+            try:
+                hash(lruHash)
+            except TypeError:
+                lruHash = strhash(args[0], kwargs)
+        key = (cls.__name__, lruHash)
+        # Most calls find an existing instance.  Reads from the in-process
+        # cache are OrderedDict operations that are safe without the lock, so
+        # only lock on a miss or while another thread is creating the
+        # instance.  The lock is still needed to check and mark a miss so the
+        # instance is only created once.
+        try:
+            result = cache[key]
+            if (not isinstance(result, tuple) or len(result) != 2 or
+                    result[0] != _cacheLockKeyToken):
+                return result
+        except KeyError:
+            pass
         with cacheLock:
             try:
                 result = cache[key]
@@ -218,6 +238,8 @@ class LruCacheMetaclass(type):
                         return result
                 except KeyError:
                     pass
+            classkey = cls.__name__ + ' ' + (
+                lruHash if isinstance(lruHash, str) else strhash(args[0], kwargs))
             try:
                 # This conditionally copies a non-styled class and adds a style.
                 if (kwargs.get('style') and hasattr(cls, '_setStyle') and
@@ -229,7 +251,7 @@ class LruCacheMetaclass(type):
                     with subresult._sourceLock:
                         result.__dict__ = subresult.__dict__.copy()
                         result._sourceLock = threading.RLock()
-                    result._classkey = key
+                    result._classkey = classkey
                     # for pickling
                     result._initValues = (args, kwargs.copy())
                     result._unstyledInstance = subresult
@@ -249,7 +271,7 @@ class LruCacheMetaclass(type):
                     except Exception:
                         pass
                 raise exc
-            instance._classkey = key
+            instance._classkey = classkey
             if kwargs.get('style') != getattr(cls, '_unstyledStyle', None):
                 subkwargs = kwargs.copy()
                 subkwargs['style'] = getattr(cls, '_unstyledStyle', None)
@@ -23,6 +23,7 @@ import cachetools
 
 from .. import config
 from ..exceptions import TileCacheError
+from .base import OrderedLRUCache
 from .memcache import MemCache
 from .rediscache import RedisCache
 
@@ -162,7 +163,7 @@ class CacheFactory:
 
         if cache is None:  # fallback backend or inProcess
             cacheBackend = 'python'
-            cache = cachetools.LRUCache(self.getCacheSize(numItems, cacheName=cacheName))
+            cache = OrderedLRUCache(self.getCacheSize(numItems, cacheName=cacheName))
             cacheLock = threading.Lock()
 
         if not inProcess and not CacheFactory.logged:
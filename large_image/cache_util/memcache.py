@@ -17,7 +17,7 @@
 import copy
 import threading
 import time
-from typing import Any, Callable, List, Optional, Tuple, TypeVar, Union
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple, TypeVar, Union
 
 from .. import config
 from .base import BaseCache
@@ -96,6 +96,28 @@ class MemCache(BaseCache):
                           'pylibmc exception')
             return self.__missing__(key)
 
+    def getMany(self, keys: Iterable[str]) -> Dict[str, Any]:
+        """
+        Get multiple values from memcached in a single request.
+
+        :param keys: an iterable of keys to fetch.
+        :returns: a dictionary of the keys that are in the cache and their
+            values.  Keys that are not in the cache are omitted.
+        """
+        hashedKeys = {self._hashKey(key): key for key in keys}
+        try:
+            values = self._client.get_multi(list(hashedKeys))
+        except self.pylibmc.ServerDown:
+            self.logError(self.pylibmc.ServerDown, config.getLogger('logprint').info,
+                          'Memcached ServerDown')
+            self._reconnect()
+            return {}
+        except self.pylibmc.Error:
+            self.logError(self.pylibmc.Error, config.getLogger('logprint').exception,
+                          'pylibmc exception')
+            return {}
+        return {hashedKeys[hashedKey]: value for hashedKey, value in values.items()}
+
     def __setitem__(self, key: str, value: Any) -> None:
         hashedKey = self._hashKey(key)
         try:
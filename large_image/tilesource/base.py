@@ -1218,9 +1218,15 @@ class TileSource(IPyLeafletMixin):
             len(set(getattr(self, 'style', {})) - {'icc'}) or
             getattr(self, 'style', {}).get('icc', config.getConfig('icc_correction', True)))
         if (tileEncoding not in (TILE_FORMAT_PIL, TILE_FORMAT_NUMPY) and
-                numpyAllowed != 'always' and tileEncoding == self.encoding and
+                numpyAllowed != 'always' and
                 not isEdge and (not applyStyle or not hasStyle)):
-            return tile
+            if tileEncoding == self.encoding:
+                return tile
+            # JPEG data can usually be sent as JFIF without recompressing it
+            jfif = utilities._jpegToJfif(tile) if (
+                self.encoding == 'JFIF' and tileEncoding == 'JPEG') else None
+            if jfif is not None:
+                return jfif
 
         if self._dtype is None or (isinstance(self._dtype, str) and self._dtype == 'check'):
             if isinstance(tile, np.ndarray):
@@ -1581,6 +1587,79 @@ class TileSource(IPyLeafletMixin):
         """
         return [True] * self.levels
 
+    def _compositeTilesFromLevel(
+            self, x: int, y: int, z: int, scale: int, lastlog: float,
+            **kwargs) -> Tuple[PIL.Image.Image, str]:
+        """
+        Composite tiles from a higher resolution level and shrink them to make
+        a lower resolution tile.
+
+        :param x: location of the tile within the lower resolution level.
+        :param y: location of the tile within the lower resolution level.
+        :param z: the higher resolution level to read.
+        :param scale: the ratio of the resolutions of the two levels.
+        :param lastlog: the time progress was last logged.
+        :returns: the shrunken composite as an RGBA PIL image and the mode of
+            the higher resolution tiles.  The image may be smaller than a tile
+            at the edge of the image.
+        """
+        fullWidth = min(self.sizeX, self.tileWidth * scale)
+        fullHeight = min(self.sizeY, self.tileHeight * scale)
+        tile = None
+        maxX = 2.0 ** (z + 1 - self.levels) * self.sizeX / self.tileWidth
+        maxY = 2.0 ** (z + 1 - self.levels) * self.sizeY / self.tileHeight
+        for newY in range(scale):
+            for newX in range(scale):
+                if ((newX or newY) and ((x * scale + newX) >= maxX or
+                                        (y * scale + newY) >= maxY)):
+                    continue
+                if time.time() - lastlog > 10:
+                    self.logger.info(
+                        'Compositing tile from higher resolution tiles x=%d y=%d z=%d',
+                        x * scale + newX, y * scale + newY, z)
+                    lastlog = time.time()
+                rawtile = self._unstyled.getTile(
+                    x * scale + newX, y * scale + newY, z,
+                    pilImageAllowed=True, numpyAllowed=False,
+                    sparseFallback=True, edge=False, frame=kwargs.get('frame'))
+                subtile = _imageToPIL(rawtile)
+                mode = subtile.mode
+                if tile is None:
+                    # JPEGs can be decoded at 1/2, 1/4, or 1/8 size, which
+                    # skips most of the decoding work for tiles that are
+                    # about to be shrunk.  Build the composite at that
+                    # reduced size, but leave the last factor of two to the
+                    # resize, since the decoder's reduction is a box filter
+                    # and subsampled color is coarser still.
+                    reduce = min(scale // 2, 8) if getattr(subtile, 'format', None) == 'JPEG' else 1
+                    tile = PIL.Image.new('RGBA', (
+                        (fullWidth + reduce - 1) // reduce,
+                        (fullHeight + reduce - 1) // reduce))
+                if reduce > 1:
+                    reducedSize = (
+                        (subtile.width + reduce - 1) // reduce,
+                        (subtile.height + reduce - 1) // reduce)
+                    if getattr(subtile, 'format', None) == 'JPEG':
+                        # An image from the source may be shared, such as
+                        # via the tile cache, and draft changes it in place,
+                        # so only use draft on a privately opened image.
+                        fp = getattr(subtile, 'fp', None)
+                        if subtile is rawtile and isinstance(fp, io.BytesIO):
+                            subtile = PIL.Image.open(io.BytesIO(fp.getvalue()))
+                        if subtile is not rawtile:
+                            subtile.draft(mode, reducedSize)
+                    # Small edge tiles and non-JPEG tiles can't be reduced
+                    # exactly by the decoder
+                    if subtile.size != reducedSize:
+                        subtile = subtile.resize(
+                            reducedSize, getattr(PIL.Image, 'Resampling', PIL.Image).LANCZOS)
+                tile.paste(subtile, (newX * self.tileWidth // reduce,
+                                     newY * self.tileHeight // reduce))
+        return cast(PIL.Image.Image, tile).resize(
+            (min(self.tileWidth, (fullWidth + scale - 1) // scale),
+             min(self.tileHeight, (fullHeight + scale - 1) // scale)),
+            getattr(PIL.Image, 'Resampling', PIL.Image).LANCZOS), mode
+
     def _getTileFromEmptyLevel(self, x: int, y: int, z: int, **kwargs) -> Tuple[
             Union[PIL.Image.Image, np.ndarray], str]:
         """
@@ -1636,32 +1715,7 @@ class TileSource(IPyLeafletMixin):
         while z - basez > self._maxSkippedLevels:
             z -= self._maxSkippedLevels
             scale = int(scale / 2 ** self._maxSkippedLevels)
-        tile = PIL.Image.new('RGBA', (
-            min(self.sizeX, self.tileWidth * scale), min(self.sizeY, self.tileHeight * scale)))
-        maxX = 2.0 ** (z + 1 - self.levels) * self.sizeX / self.tileWidth
-        maxY = 2.0 ** (z + 1 - self.levels) * self.sizeY / self.tileHeight
-        for newY in range(scale):
-            for newX in range(scale):
-                if ((newX or newY) and ((x * scale + newX) >= maxX or
-                                        (y * scale + newY) >= maxY)):
-                    continue
-                if time.time() - lastlog > 10:
-                    self.logger.info(
-                        'Compositing tile from higher resolution tiles x=%d y=%d z=%d',
-                        x * scale + newX, y * scale + newY, z)
-                    lastlog = time.time()
-                subtile = self._unstyled.getTile(
-                    x * scale + newX, y * scale + newY, z,
-                    pilImageAllowed=True, numpyAllowed=False,
-                    sparseFallback=True, edge=False, frame=kwargs.get('frame'))
-                subtile = _imageToPIL(subtile)
-                mode = subtile.mode
-                tile.paste(subtile, (newX * self.tileWidth,
-                                     newY * self.tileHeight))
-        tile = tile.resize(
-            (min(self.tileWidth, (tile.width + scale - 1) // scale),
-             min(self.tileHeight, (tile.height + scale - 1) // scale)),
-            getattr(PIL.Image, 'Resampling', PIL.Image).LANCZOS)
+        tile, mode = self._compositeTilesFromLevel(x, y, z, scale, lastlog, **kwargs)
         if tile.width != self.tileWidth or tile.height != self.tileHeight:
             fulltile = PIL.Image.new('RGBA', (self.tileWidth, self.tileHeight))
             fulltile.paste(tile, (0, 0))
@@ -1802,50 +1856,86 @@ class TileSource(IPyLeafletMixin):
         :param cropToImage: if True, don't return region coordinates outside of
             the image.
         """
-        units = sourceRegion.get('units')
-        if units not in TileInputUnits:
-            raise ValueError('Invalid units %r' % units)
-        units = TileInputUnits[units]
+        return self.convertRegionScales(
+            [sourceRegion], sourceScale, targetScale, targetUnits,
+            cropToImage)[0]
+
+    def convertRegionScales(
+            self, sourceRegions: List[Dict[str, Any]],
+            sourceScale: Optional[Dict[str, float]] = None,
+            targetScale: Optional[Dict[str, float]] = None,
+            targetUnits: Optional[str] = None,
+            cropToImage: bool = True) -> List[Dict[str, Any]]:
+        """
+        Convert a list of regions from one scale to another.  This returns the
+        same values as calling convertRegionScale for each region, but the
+        scale factors are only computed once.
+
+        :param sourceRegions: a list of dictionaries, each of which specifies
+            a region as described in convertRegionScale.
+        :param sourceScale: a dictionary of optional values which specify the
+            scale of the source regions.  See convertRegionScale.
+        :param targetScale: a dictionary of optional values which specify the
+            scale of the target regions.  See convertRegionScale.
+        :param targetUnits: if not None, convert the regions to these units.
+            See convertRegionScale.
+        :param cropToImage: if True, don't return region coordinates outside of
+            the image.
+        :returns: a list of converted regions in the same order as the source
+            regions.
+        """
+        regionUnits = []
+        for sourceRegion in sourceRegions:
+            units = sourceRegion.get('units')
+            if units not in TileInputUnits:
+                raise ValueError('Invalid units %r' % units)
+            regionUnits.append(TileInputUnits[units])
         if targetUnits is not None:
             if targetUnits not in TileInputUnits:
                 raise ValueError('Invalid units %r' % targetUnits)
             targetUnits = TileInputUnits[targetUnits]
-        if (units != 'mag_pixels' and (
-                targetUnits is None or targetUnits == units)):
-            return sourceRegion
+        targetRegions = list(sourceRegions)
+        convert = [
+            idx for idx, units in enumerate(regionUnits)
+            if units == 'mag_pixels' or (
+                targetUnits is not None and targetUnits != units)]
+        if not convert:
+            return targetRegions
         magArgs: Dict[str, Any] = (sourceScale or {}).copy()
         magArgs['rounding'] = None
         magLevel = self.getLevelForMagnification(**magArgs)
         mag = self.getMagnificationForLevel(magLevel)
         metadata = self.getMetadata()
-        # Get region in base pixels
-        left, top, right, bottom = self._getRegionBounds(
-            metadata, desiredMagnification=mag, cropToImage=cropToImage,
-            **sourceRegion)
-        # If requested, convert region to targetUnits
         desMagArgs: Dict[str, Any] = (targetScale or {}).copy()
         desMagArgs['rounding'] = None
         desMagLevel = self.getLevelForMagnification(**desMagArgs)
         desiredMagnification = self.getMagnificationForLevel(desMagLevel)
         scaleX, scaleY = self._scaleFromUnits(metadata, targetUnits, desiredMagnification)
-        left = float(left) / scaleX
-        right = float(right) / scaleX
-        top = float(top) / scaleY
-        bottom = float(bottom) / scaleY
-        targetRegion = {
-            'left': left,
-            'top': top,
-            'right': right,
-            'bottom': bottom,
-            'width': right - left,
-            'height': bottom - top,
-            'units': TileInputUnits[targetUnits],
-        }
-        # Reduce region information to match what was supplied
-        for key in ('left', 'top', 'right', 'bottom', 'width', 'height'):
-            if key not in sourceRegion:
-                del targetRegion[key]
-        return targetRegion
+        # Get regions in base pixels as rows of left, top, right, bottom and
+        # convert them to targetUnits together
+        bounds = np.array([
+            self._getRegionBounds(
+                metadata, desiredMagnification=mag, cropToImage=cropToImage,
+                **sourceRegions[idx])
+            for idx in convert], dtype=float)
+        bounds[:, ::2] /= scaleX
+        bounds[:, 1::2] /= scaleY
+        for idx, (left, top, right, bottom) in zip(convert, bounds.tolist()):
+            targetRegion = {
+                'left': left,
+                'top': top,
+                'right': right,
+                'bottom': bottom,
+                'width': right - left,
+                'height': bottom - top,
+                'units': TileInputUnits[targetUnits],
+            }
+            # Reduce region information to match what was supplied
+            for key in ('left', 'top', 'right', 'bottom', 'width', 'height'):
+                if key not in sourceRegions[idx]:
+                    del targetRegion[key]
+            targetRegions[idx] = targetRegion
+        return targetRegions
 
     def getRegion(self, format: Union[str, Tuple[str]] = (TILE_FORMAT_IMAGE, ), **kwargs) -> Tuple[
             Union[np.ndarray, PIL.Image.Image, ImageBytes, bytes, pathlib.Path], str]:
@@ -2275,6 +2365,55 @@ class TileSource(IPyLeafletMixin):
             level = max(0, min(mag['level'] or 0, level))
         return level
 
+    def getLevelsForMagnifications(
+        self, magnifications: Union[List[Optional[float]], npt.ArrayLike],
+        exact: bool = False, rounding: Optional[Union[str, bool]] = 'round',
+    ) -> List[Optional[Union[int, float]]]:
+        """
+        Get the levels for a list of magnifications.  This returns the same
+        values as calling getLevelForMagnification for each magnification,
+        but computes them together.
+
+        :param magnifications: a list or array of magnification ratios.  Falsy
+            values select the maximum level.
+        :param exact: if True, only a level that matches exactly will be
+            returned.
+        :param rounding: if False, a fractional level may be returned.  If
+            'ceil' or 'round', that function is used to convert the level to an
+            integer (the exact flag still applies).  If None, the level is not
+            cropped to the actual image's level range.
+        :returns: a list with the selected level or None for no match for
+            each magnification.
+        """
+        mag = self.getMagnificationForLevel()
+        maxLevel = mag['level'] or 0
+        mags = np.array([
+            float(value) if value else 0
+            for value in np.asarray(magnifications, dtype=object).ravel()])
+        if not mag['magnification']:
+            return [mag.get('level', 0)] * len(mags)
+        known = mags > 0
+        # Match the scalar computation, including the slight rounding used to
+        # handle numerical precision issues
+        ratios = np.round(np.log(
+            np.where(known, mags, mag['magnification']) / mag['magnification'],
+        ) / math.log(2), 4)
+        levels = maxLevel + ratios
+        if rounding:
+            levels = np.ceil(levels) if rounding == 'ceil' else np.round(levels)
+        invalid = np.zeros(len(mags), dtype=bool)
+        if exact:
+            invalid |= (ratios != np.trunc(ratios)) | (levels > maxLevel) | (levels < 0)
+        if rounding == 'ceil':
+            invalid |= levels > maxLevel
+        if rounding is not None:
+            levels = np.clip(levels, 0, maxLevel)
+        return [
+            mag.get('level', 0) if not isKnown else
+            None if isInvalid else
+            int(level) if rounding else float(level)
+            for level, isKnown, isInvalid in zip(levels, known, invalid)]
+
     def tileIterator(
             self, format: Union[str, Tuple[str]] = (TILE_FORMAT_NUMPY, ),
             resample: bool = True, **kwargs) -> Iterator[LazyTileDict]:
@@ -90,6 +90,83 @@ class JSONDict(dict):
         return self
 
 
+def _encodeJpegArray(
+        image: np.ndarray, mode: str, jpegQuality: Union[str, int],
+        jpegSubsampling: Union[str, int]) -> bytes:
+    """
+    Encode a uint8 numpy array to a jpeg using simplejpeg.
+
+    :param image: a three dimensional uint8 numpy array with 1, 3, or 4 bands.
+    :param mode: the PIL mode of the image; one of 'L', 'RGB', or 'RGBA'.
+    :param jpegQuality: the quality to use when encoding a JPEG.
+    :param jpegSubsampling: the subsampling level to use when encoding a JPEG.
+    :returns: a binary jpeg image.
+    """
+    return ImageBytes(simplejpeg.encode_jpeg(
+        np.ascontiguousarray(image),
+        quality=jpegQuality,
+        colorspace=mode if mode in {'RGB', 'RGBA'} else 'GRAY',
+        colorsubsampling={-1: '444', 0: '444', 1: '422', 2: '420'}.get(
+            cast(int, jpegSubsampling), str(jpegSubsampling).strip(':')),
+    ), mimetype='image/jpeg')
+
+
+# A JFIF APP0 segment: version 1.01, no density units, 1:1 aspect ratio, and
+# no thumbnail.
+_JFIFSegment = b'\xff\xe0\x00\x10JFIF\x00\x01\x01\x00\x00\x01\x00\x01\x00\x00'
+# Huffman-coded baseline, extended, and progressive start of frame markers
+_JPEGHuffmanSOFMarkers = {0xC0, 0xC1, 0xC2}
+
+
+def _jpegToJfif(data: Any) -> Optional[bytes]:
+    """
+    Get JPEG data as JFIF without recompressing it, if this doesn't change how
+    the image is decoded.  Without JFIF or Adobe markers, 8-bit greyscale
+    images and three component images with component ids that are not R, G, B
+    are decoded as YCbCr, which is what a JFIF header specifies.
+
+    :param data: the JPEG data.  Other types of tile data are not converted.
+    :returns: the data with a JFIF header, or None if the image needs to be
+        recompressed to be JFIF.
+    """
+    if not isinstance(data, bytes) or data[:2] != b'\xff\xd8':
+        return None
+    frame = None
+    pos = 2
+    while pos + 4 <= len(data):
+        if data[pos] != 0xFF:
+            return None
+        marker = data[pos + 1]
+        if marker == 0xFF:
+            # fill byte
+            pos += 1
+            continue
+        if marker == 0xDA:
+            break
+        length = int.from_bytes(data[pos + 2:pos + 4], 'big')
+        if marker == 0xE0 and data[pos + 4:pos + 9] == b'JFIF\x00':
+            return data
+        if marker == 0xEE:
+            # Adobe markers specify a color transform
+            return None
+        if 0xC0 <= marker <= 0xCF and marker not in {0xC4, 0xC8, 0xCC}:
+            # Other frame types aren't widely supported
+            if marker not in _JPEGHuffmanSOFMarkers or frame is not None:
+                return None
+            frame = data[pos + 4:pos + 2 + length]
+        pos += 2 + length
+    else:
+        return None
+    if frame is None or len(frame) < 6 or frame[0] != 8:
+        return None
+    if frame[5] == 3:
+        if frame[6:15:3] == b'RGB':
+            return None
+    elif frame[5] != 1:
+        return None
+    return data[:2] + _JFIFSegment + data[2:]
+
+
 def _encodeImageBinary(
         image: PIL.Image.Image, encoding: str, jpegQuality: Union[str, int],
         jpegSubsampling: Union[str, int], tiffCompression: str) -> bytes:
@@ -113,13 +190,8 @@ def _encodeImageBinary(
         if image.mode not in ({'L', 'RGB', 'RGBA'} if simplejpeg else {'L', 'RGB'}):
             image = image.convert('RGB' if image.mode != 'LA' else 'L')
         if simplejpeg:
-            return ImageBytes(simplejpeg.encode_jpeg(
-                _imageToNumpy(image)[0],
-                quality=jpegQuality,
-                colorspace=image.mode if image.mode in {'RGB', 'RGBA'} else 'GRAY',
-                colorsubsampling={-1: '444', 0: '444', 1: '422', 2: '420'}.get(
-                    cast(int, jpegSubsampling), str(jpegSubsampling).strip(':')),
-            ), mimetype='image/jpeg')
+            return _encodeJpegArray(
+                _imageToNumpy(image)[0], image.mode, jpegQuality, jpegSubsampling)
         params['quality'] = jpegQuality
         params['subsampling'] = jpegSubsampling
     elif encoding in {'TIFF', 'TILED'}:
@@ -188,9 +260,20 @@ def _encodeImage(
         if encoding not in TileOutputMimeTypes:
             raise ValueError('Invalid encoding "%s"' % encoding)
         imageFormatOrMimeType = TileOutputMimeTypes[encoding]
-        image = _imageToPIL(image)
-        imageData = _encodeImageBinary(
-            image, encoding, jpegQuality, jpegSubsampling, tiffCompression)
+        if (simplejpeg and TileOutputPILFormat.get(encoding, encoding) == 'JPEG' and
+                isinstance(image, np.ndarray) and image.dtype == np.uint8 and
+                image.size and (len(image.shape) == 2 or (
+                    len(image.shape) == 3 and image.shape[2] in {1, 3, 4}))):
+            # Encode uint8 arrays directly rather than converting them to a
+            # PIL image and back to an array.
+            if len(image.shape) == 2:
+                image = image[:, :, np.newaxis]
+            imageData = _encodeJpegArray(
+                image, modesBySize[image.shape[2] - 1], jpegQuality, jpegSubsampling)
+        else:
+            image = _imageToPIL(image)
+            imageData = _encodeImageBinary(
+                image, encoding, jpegQuality, jpegSubsampling, tiffCompression)
     return imageData, imageFormatOrMimeType
 
 
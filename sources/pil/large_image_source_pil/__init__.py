@@ -147,8 +147,8 @@ class PILFileTileSource(FileTileSource, metaclass=LruCacheMetaclass):
                     raise TileSourceFileNotFoundError(largeImagePath) from None
                 msg = 'File cannot be opened via PIL.'
                 raise TileSourceError(msg)
-        minwh = min(self._pilImage.width, self._pilImage.height)
-        maxwh = max(self._pilImage.width, self._pilImage.height)
+        minwh = min(self._pilImage.size)
+        maxwh = max(self._pilImage.size)
         # Throw an exception if too small or big before processing further
         if minwh <= 0:
             msg = 'PIL tile size is invalid.'
@@ -187,8 +187,7 @@ class PILFileTileSource(FileTileSource, metaclass=LruCacheMetaclass):
             self._factor = 255.0 / max(maxval, 1)
             self._pilImage = PIL.Image.fromarray(np.uint8(np.multiply(
                 imgdata, self._factor)))
-        self.sizeX = self._pilImage.width
-        self.sizeY = self._pilImage.height
+        self.sizeX, self.sizeY = self._pilImage.size
         # We have just one tile which is the entire image.
         self.tileWidth = self.sizeX
         self.tileHeight = self.sizeY
@@ -148,15 +148,15 @@ class _BaseGeoTests:
         # We get a thumbnail without a projection
         image, mimeType = source.getThumbnail(encoding='PNG')
         assert isinstance(image, ImageBytes)
-        assert image[:len(utilities.PNGHeader)] == utilities.PNGHeader
+        assert image.startswith(utilities.PNGHeader)
         image, mimeType = source.getThumbnail(encoding='JPEG')
         assert isinstance(image, ImageBytes)
-        assert image[:len(utilities.JPEGHeader)] == utilities.JPEGHeader
+        assert image.startswith(utilities.JPEGHeader)
         # We get a different thumbnail with a projection
         source = self.basemodule.open(imagePath, projection='EPSG:3857')
         image2, mimeType = source.getThumbnail(encoding='PNG')
         assert isinstance(image2, ImageBytes)
-        assert image2[:len(utilities.PNGHeader)] == utilities.PNGHeader
+        assert image2.startswith(utilities.PNGHeader)
         assert image != image2
 
     def testPixel(self):
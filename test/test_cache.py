@@ -11,10 +11,26 @@ from large_image import config
 from large_image.cache_util import (LruCacheMetaclass, MemCache, RedisCache,
                                     cachesClear, cachesInfo, getTileCache,
                                     methodcache, strhash)
+from large_image.cache_util.base import OrderedLRUCache
 
 
 class Fib:
+    def __init__(self):
+        self.calls = 0
+
     def num(self, k):
+        # Iterative so that a cache miss never makes this exponential
+        self.calls += 1
+        a, b = 1, 1
+        for _ in range(k - 2):
+            a, b = b, a + b
+        return b
+
+
+class RecursiveFib(Fib):
+    def num(self, k):
+        # Only finishes quickly if the recursive calls hit the cache
+        self.calls += 1
         if k > 2:
             return self.num(k - 1) + self.num(k - 2)
         return 1
@@ -23,7 +39,8 @@ class Fib:
 def cache_test(specific_cache, maxNum=100):
     temp = Fib()
     temp.num = cachetools.cached(cache=specific_cache, key=strhash)(temp.num)
-    temp.num(maxNum)
+    for k in range(1, maxNum + 1):
+        temp.num(k)
     if maxNum >= 3:
         assert temp.num(3) == 2
     if maxNum >= 100:
@@ -34,6 +51,48 @@ def testLRUCacheTools():
     cache_test(cachetools.Cache(1000))
 
 
+def testLRUCacheToolsHit():
+    temp = Fib()
+    temp.num = cachetools.cached(cache=cachetools.Cache(1000), key=strhash)(temp.num)
+    assert temp.num(100) == 354224848179261915075
+    assert temp.calls == 1
+    assert temp.num(100) == 354224848179261915075
+    assert temp.calls == 1
+    assert temp.num(99) == 218922995834555169026
+    assert temp.calls == 2
+
+
+def testLRUCacheToolsRecursive():
+    temp = RecursiveFib()
+    temp.num = cachetools.cached(cache=cachetools.Cache(1000), key=strhash)(temp.num)
+    assert temp.num(100) == 354224848179261915075
+    # Each value is only computed once
+    assert temp.calls == 100
+    assert temp.num(100) == 354224848179261915075
+    assert temp.calls == 100
+
+
+def testOrderedLRUCache():
+    cache_test(OrderedLRUCache(1000))
+    cache = OrderedLRUCache(3)
+    for k in range(3):
+        cache[k] = k * 10
+    # Reading an item makes it the most recently used
+    assert cache[0] == 0
+    cache[3] = 30
+    assert list(cache) == [2, 0, 3]
+    assert 1 not in cache
+    assert cache.get(1) is None
+    assert cache.currsize == len(cache) == 3
+    assert cache.maxsize == 3
+    assert cache.popitem() == (2, 20)
+    assert cache.pop(0) == 0
+    cache.clear()
+    assert cache.currsize == 0
+    with pytest.raises(KeyError):
+        cache.popitem()
+
+
 @pytest.mark.singular
 def testCacheMemcached():
     cache_test(MemCache())
@@ -49,6 +108,8 @@ def testCheckCacheMemcached():
     assert val == 1
     val = cache['(100,)']
     assert val == 354224848179261915075
+    assert cache.getMany(['(2,)', '(100,)', 'notakey']) == {
+        '(2,)': 1, '(100,)': 354224848179261915075}
 
 
 @pytest.mark.singular
@@ -88,7 +149,7 @@ def testGetTileCachePython():
     large_image.cache_util.cache._tileLock = None
     config.setConfig('cache_backend', 'python')
     tileCache, tileLock = getTileCache()
-    assert isinstance(tileCache, cachetools.LRUCache)
+    assert isinstance(tileCache, OrderedLRUCache)
     assert 'tileCache' in cachesInfo()
 
 
@@ -213,3 +274,42 @@ class TestClass:
         assert cachesInfo()['test']['used'] == 1
         cachesClear()
         assert cachesInfo()['test']['used'] == 0
+
+    @pytest.mark.singular
+    def testCachesKey(self):
+        cachesClear()
+        first = self.ExampleWithMetaclass('test')
+        assert self.ExampleWithMetaclass('test') is first
+        assert first._classkey == 'ExampleWithMetaclass ' + strhash('test', {})
+        # Unhashable arguments fall back to a string key
+        second = self.ExampleWithMetaclass(['test'])
+        assert self.ExampleWithMetaclass(['test']) is second
+        assert second._classkey == 'ExampleWithMetaclass ' + strhash(['test'], {})
+        assert cachesInfo()['test']['used'] == 2
+
+    def testCachesOnClass(self):
+        class Other(self.ExampleWithMetaclass, cacheName='testother', cacheMaxSize=2):
+            pass
+
+        assert self.ExampleWithMetaclass._lruCache is LruCacheMetaclass.classCaches[
+            self.ExampleWithMetaclass]
+        assert Other._lruCache is LruCacheMetaclass.classCaches[Other]
+        assert Other._lruCache[0] is not self.ExampleWithMetaclass._lruCache[0]
+        assert Other._lruCache[0].maxsize == 2
+
+    @pytest.mark.singular
+    def testCachesConcurrentCreate(self):
+        created = []
+
+        class Counted(metaclass=LruCacheMetaclass):
+            cacheName = 'testcounted'
+            cacheMaxSize = 4
+
+            def __init__(self, arg):
+                created.append(arg)
+                time.sleep(0.1)
+
+        with concurrent.futures.ThreadPoolExecutor(max_workers=8) as executor:
+            results = list(executor.map(Counted, ['a'] * 16))
+        assert created == ['a']
+        assert all(result is results[0] for result in results)
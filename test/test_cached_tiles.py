@@ -110,7 +110,7 @@ class LargeImageCachedTilesTest:
             'encoding': 'PNG',
         }
         image, mimeType = source.getRegion(**params)
-        assert image[:len(utilities.PNGHeader)] == utilities.PNGHeader
+        assert image.startswith(utilities.PNGHeader)
 
     @pytest.mark.singular
     def testTiffClosed(self):
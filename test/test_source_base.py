@@ -10,6 +10,7 @@ import PIL.Image
 import pytest
 
 import large_image
+from large_image.cache_util import LruCacheMetaclass, methodcache
 from large_image.tilesource import nearPowerOfTwo
 
 from . import utilities
@@ -340,6 +341,81 @@ def testTileOverlap():
     ]
 
 
+class _JpegMissingLevelsSource(large_image.tilesource.TileSource):
+    """A source with only its full resolution level, stored as JPEG tiles."""
+
+    def __init__(self, image, **kwargs):
+        super().__init__(**kwargs)
+        self.image = image
+        self.tileWidth = self.tileHeight = 64
+        self.sizeY, self.sizeX = image.shape[:2]
+        self.levels = 4
+
+    def _nonemptyLevelsList(self, frame=0):
+        return [None] * (self.levels - 1) + [True]
+
+    def getTile(self, x, y, z, pilImageAllowed=False, numpyAllowed=False, **kwargs):
+        if z != self.levels - 1:
+            tile, format = self._getTileFromEmptyLevel(x, y, z, **kwargs)
+            return self._outputTile(
+                tile, format, x, y, z, pilImageAllowed, numpyAllowed, **kwargs)
+        output = io.BytesIO()
+        PIL.Image.fromarray(self.image[y * 64:(y + 1) * 64, x * 64:(x + 1) * 64]).save(
+            output, 'JPEG', quality=95)
+        return output.getvalue()
+
+
+def testTileFromEmptyLevelJpeg():
+    # A smooth image, so decoding at a reduced size is close to shrinking it
+    image = np.asarray(PIL.Image.fromarray(
+        np.random.default_rng(0).integers(0, 255, (8, 8, 3), dtype=np.uint8)).resize(
+        (500, 450), PIL.Image.BICUBIC))
+    ts = _JpegMissingLevelsSource(image)
+    tile = ts.getTile(0, 0, 0, numpyAllowed='always')
+    assert tile.shape == (64, 64, 3)
+    expected = np.asarray(PIL.Image.fromarray(image).resize((63, 57), PIL.Image.LANCZOS))
+    assert np.abs(tile[:56, :62].astype(int) - expected[:56, :62]).mean() < 2
+    # Edge tiles are reduced to the same scale as the others
+    tile = ts.getTile(1, 1, 1, numpyAllowed='always')
+    assert tile.shape == (64, 64, 3)
+    expected = np.asarray(PIL.Image.fromarray(image[256:, 256:]).resize(
+        (61, 49), PIL.Image.LANCZOS))
+    assert np.abs(tile[:48, :60].astype(int) - expected[:48, :60]).mean() < 2
+
+
+class _CachedJpegMissingLevelsSource(
+        _JpegMissingLevelsSource, metaclass=LruCacheMetaclass):
+    """
+    Like _JpegMissingLevelsSource, but tiles are cached and full resolution
+    tiles can be lazily opened PIL images, as some file sources return.
+    """
+
+    cacheName = 'tilesource'
+
+    @methodcache()
+    def getTile(self, x, y, z, pilImageAllowed=False, numpyAllowed=False, **kwargs):
+        tile = super().getTile(x, y, z, pilImageAllowed, numpyAllowed, **kwargs)
+        if z == self.levels - 1 and pilImageAllowed:
+            tile = PIL.Image.open(io.BytesIO(tile))
+        return tile
+
+
+def testTileFromEmptyLevelJpegCachedSubtiles():
+    image = np.asarray(PIL.Image.fromarray(
+        np.random.default_rng(0).integers(0, 255, (8, 8, 3), dtype=np.uint8)).resize(
+        (500, 450), PIL.Image.BICUBIC))
+    ts = _CachedJpegMissingLevelsSource(image, noCache=True)
+    ts.getTile(0, 0, 1, numpyAllowed='always')
+    # The cached full resolution tile must not have been reduced in place
+    subtile = ts.getTile(
+        0, 0, 3, pilImageAllowed=True, numpyAllowed=False,
+        sparseFallback=True, edge=False, frame=None)
+    assert subtile.size == (64, 64)
+    tile = ts.getTile(0, 0, 2, numpyAllowed='always')
+    fresh = _CachedJpegMissingLevelsSource(image, noCache=True)
+    assert (tile == fresh.getTile(0, 0, 2, numpyAllowed='always')).all()
+
+
 def testLazyTileRelease():
     imagePath = datastore.fetch('sample_image.ptif')
     ts = large_image.open(imagePath)
@@ -623,6 +699,67 @@ def testImageBytes():
     assert ib._repr_png_() is None
 
 
+@pytest.mark.parametrize('shape', [(48, 64), (48, 64, 1), (48, 64, 3), (48, 64, 4)])
+def testEncodeJpegArray(shape):
+    tsutilities = large_image.tilesource.utilities
+    image = np.random.default_rng(0).integers(0, 255, shape, dtype=np.uint8)
+    data, mimetype = tsutilities._encodeImage(image, 'JPEG')
+    assert mimetype == 'image/jpeg'
+    assert data.mimetype == 'image/jpeg'
+    # Arrays are encoded the same whether or not they go through PIL
+    assert data == tsutilities._encodeImageBinary(
+        tsutilities._imageToPIL(image), 'JPEG', 95, 0, 'raw')
+    # A strided view is also accepted
+    data, _ = tsutilities._encodeImage(image[::2], 'JPEG')
+    img = PIL.Image.open(io.BytesIO(data))
+    assert (img.width, img.height) == (64, 24)
+
+
+def _stripJfif(data):
+    assert data.startswith(utilities.JFIFHeader)
+    return data[:2] + data[4 + int.from_bytes(data[4:6], 'big'):]
+
+
+@pytest.mark.parametrize('mode', ['L', 'RGB'])
+def testJpegToJfif(mode):
+    jpegToJfif = large_image.tilesource.utilities._jpegToJfif
+    image = PIL.Image.fromarray(np.random.default_rng(0).integers(
+        0, 255, (48, 64, 3), dtype=np.uint8)).convert(mode)
+    output = io.BytesIO()
+    image.save(output, 'JPEG')
+    jfif = output.getvalue()
+    assert jpegToJfif(jfif) is jfif
+    data = _stripJfif(jfif)
+    result = jpegToJfif(data)
+    assert result.startswith(utilities.JFIFHeader)
+    assert (np.asarray(PIL.Image.open(io.BytesIO(result))) ==
+            np.asarray(PIL.Image.open(io.BytesIO(data)))).all()
+
+    ts = large_image.tilesource.TileSource(encoding='JFIF', style={'icc': False})
+    ts.sizeX, ts.sizeY, ts.levels = 64, 48, 1
+    assert ts._outputTile(data, 'JPEG', 0, 0, 0) == result
+    # Component ids of R, G, B mean the data isn't YCbCr, so it must be
+    # recompressed
+    if mode == 'RGB':
+        sof = data.index(b'\xff\xc0')
+        data = bytearray(data)
+        data[sof + 10:sof + 19:3] = b'RGB'
+        assert jpegToJfif(bytes(data)) is None
+        assert ts._outputTile(bytes(data), 'JPEG', 0, 0, 0).startswith(utilities.JFIFHeader)
+
+
+def testJpegToJfifNotConverted():
+    jpegToJfif = large_image.tilesource.utilities._jpegToJfif
+    image = PIL.Image.new('CMYK', (16, 16))
+    output = io.BytesIO()
+    image.save(output, 'JPEG')
+    # Adobe markers specify the color transform
+    assert jpegToJfif(output.getvalue()) is None
+    assert jpegToJfif(b'\x89PNG\r\n') is None
+    assert jpegToJfif(b'\xff\xd8\xff') is None
+    assert jpegToJfif(PIL.Image.new('RGB', (16, 16))) is None
+
+
 @pytest.mark.parametrize('format', [
     format for format in large_image.constants.TileOutputMimeTypes
     if format not in {'TILED'}])
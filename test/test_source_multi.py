@@ -165,7 +165,7 @@ def testAssociatedImages(multiSourceImagePath):
     source = large_image_source_multi.open(imagePath)
     assert 'label' in source.getAssociatedImagesList()
     image, mimeType = source.getAssociatedImage('label')
-    assert image[:len(utilities.JPEGHeader)] == utilities.JPEGHeader
+    assert image.startswith(utilities.JPEGHeader)
 
 
 def testCanRead():
@@ -183,7 +183,7 @@ def testMultiBand():
     metadata = source.getMetadata()
     assert len(metadata['bands']) == 6
     image, mimeType = source.getThumbnail(encoding='PNG')
-    assert image[:len(utilities.PNGHeader)] == utilities.PNGHeader
+    assert image.startswith(utilities.PNGHeader)
 
 
 def testFramesAsAxes():
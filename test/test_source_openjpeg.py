@@ -26,7 +26,7 @@ def testAssociatedImagesFromOpenJPEG():
     imageList = source.getAssociatedImagesList()
     assert imageList == ['label', 'macro']
     image, mimeType = source.getAssociatedImage('macro')
-    assert image[:len(utilities.JPEGHeader)] == utilities.JPEGHeader
+    assert image.startswith(utilities.JPEGHeader)
     # Test missing associated image
     assert source.getAssociatedImage('nosuchimage') is None
 
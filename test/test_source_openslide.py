@@ -1,5 +1,5 @@
 import os
-import struct
+import threading
 
 import large_image_source_openslide
 import numpy as np
@@ -7,19 +7,39 @@ import PIL.Image
 import pytest
 
 from large_image import constants
+from large_image.tilesource.utilities import _imageToNumpy
 
 from . import utilities
 from .datastore import datastore
 
 
-def testTilesFromSVS():
+# Fetching verifies the file's hash, so only do it once per module
+@pytest.fixture(scope='module')
+def jp2kSvsPath():
+    return datastore.fetch(
+        'sample_jp2k_33003_TCGA-CV-7242-11A-01-TS1.1838afb1-9eee-'
+        '4a70-9ae3-50e3ab45e242.svs')
+
+
+@pytest.fixture(scope='module')
+def jp2kSvsSource(jp2kSvsPath):
+    # Tests that use this must not modify the source
+    return large_image_source_openslide.open(jp2kSvsPath)
+
+
+@pytest.fixture(scope='module')
+def svsPath():
+    return datastore.fetch(
+        'sample_svs_image.TCGA-DU-6399-01A-01-TS1.e8eb65de-d63e-42db-'
+        'af6f-14fefbbdf7bd.svs')
+
+
+def testTilesFromSVS(svsPath):
     testDir = os.path.dirname(os.path.realpath(__file__))
     imagePath = os.path.join(testDir, 'test_files', 'yb10kx5k.png')
     assert large_image_source_openslide.canRead(imagePath) is False
 
-    imagePath = datastore.fetch(
-        'sample_svs_image.TCGA-DU-6399-01A-01-TS1.e8eb65de-d63e-42db-'
-        'af6f-14fefbbdf7bd.svs')
+    imagePath = svsPath
     assert large_image_source_openslide.canRead(imagePath) is True
     source = large_image_source_openslide.open(imagePath)
     tileMetadata = source.getMetadata()
@@ -31,11 +51,8 @@ def testTilesFromSVS():
     utilities.checkTilesZXY(source, tileMetadata)
 
 
-def testMagnification():
-    imagePath = datastore.fetch(
-        'sample_jp2k_33003_TCGA-CV-7242-11A-01-TS1.1838afb1-9eee-'
-        '4a70-9ae3-50e3ab45e242.svs')
-    source = large_image_source_openslide.open(imagePath)
+def testMagnification(jp2kSvsSource):
+    source = jp2kSvsSource
     # tileMetadata = source.getMetadata()
     mag = source.getNativeMagnification()
     assert mag['magnification'] == 40.0
@@ -75,119 +92,144 @@ def testMagnification():
     assert source.getLevelForMagnification(80) == 7
     assert source.getLevelForMagnification(80, exact=True) is None
     assert source.getLevelForMagnification(0.1) == 0
-
-
-def testTileIterator():
-    imagePath = datastore.fetch(
-        'sample_jp2k_33003_TCGA-CV-7242-11A-01-TS1.1838afb1-9eee-'
-        '4a70-9ae3-50e3ab45e242.svs')
-    source = large_image_source_openslide.open(imagePath)
-    tileCount = 0
+    assert source.getLevelsForMagnifications([40, 20, 0.3125, 15, 25]) == [7, 6, 0, 6, 6]
+    assert source.getLevelsForMagnifications([15, 25], rounding='ceil') == [6, 7]
+    assert source.getLevelsForMagnifications(
+        [15, 25, 45], rounding=False) == [5.585, 6.3219, 7]
+    assert source.getLevelsForMagnifications(
+        [15, 25, 45], rounding=None) == [5.585, 6.3219, 7.1699]
+    assert source.getLevelsForMagnifications(
+        [None, 40, 80, 20.5], exact=True) == [7, 7, None, None]
+    assert source.getLevelsForMagnifications(np.array([80, 0.1])) == [7, 0]
+
+
+def testTileIterator(jp2kSvsSource):
+    source = jp2kSvsSource
     visited = {}
-    for tile in source.tileIterator(
-            format=constants.TILE_FORMAT_PIL, scale={'magnification': 5}):
+    visitedLock = threading.Lock()
+
+    def checkTile(tile):
         # Check that we haven't loaded the tile's image yet
         assert not getattr(tile, 'loaded', None)
-        visited.setdefault(tile['level_x'], {})[tile['level_y']] = True
-        tileCount += 1
+        with visitedLock:
+            visited.setdefault(tile['level_x'], {})[tile['level_y']] = True
         assert tile['tile'].size == (tile['width'], tile['height'])
         assert tile['width'] == 256 if tile['level_x'] < 11 else 61
         assert tile['height'] == 256 if tile['level_y'] < 11 else 79
         # Check that we have loaded the tile's image
         assert getattr(tile, 'loaded', None) is True
+
+    tileCount = utilities.drainTileIterator(source.tileIterator(
+        format=constants.TILE_FORMAT_PIL, scale={'magnification': 5}), checkTile)
     assert tileCount == 144
     assert len(visited) == 12
     assert len(visited[0]) == 12
-    # Check with a non-native magnfication with exact=True
-    tileCount = 0
-    for _tile in source.tileIterator(
-            scale={'magnification': 4, 'exact': True}):
-        tileCount += 1
-    assert tileCount == 0
-    # Check with a non-native (but factor of 2) magnfication with exact=True
-    for _tile in source.tileIterator(
-            scale={'magnification': 2.5, 'exact': True}):
-        tileCount += 1
-    assert tileCount == 0
+    # Check with non-native magnfications with exact=True, including one that
+    # is a factor of 2 from a native magnification
+    for magnification in (4, 2.5):
+        assert source.getTileCount(
+            scale={'magnification': magnification, 'exact': True}) == 0
     # Check with a native magnfication with exact=True
-    for _tile in source.tileIterator(
-            scale={'magnification': 5, 'exact': True}):
-        tileCount += 1
-    assert tileCount == 144
+    assert source.getTileCount(scale={'magnification': 5, 'exact': True}) == 144
+
+
+def testTileIteratorResample(jp2kSvsSource):
+    source = jp2kSvsSource
+
     # Check with a non-native magnfication without resampling
-    tileCount = 0
-    for tile in source.tileIterator(
-            format=constants.TILE_FORMAT_PIL, scale={'magnification': 2}, resample=False):
-        tileCount += 1
-        assert tile['tile'].size == (tile['width'], tile['height'])
+    def checkUnresampledTile(tile):
         assert tile['width'] == 256 if tile['level_x'] < 11 else 61
         assert tile['height'] == 256 if tile['level_y'] < 11 else 79
+        # Only decode the first tile and the partial tiles on the edges
+        if not tile['tile_position']['position'] or 11 in (tile['level_x'], tile['level_y']):
+            assert tile['tile'].size == (tile['width'], tile['height'])
+
+    tileCount = utilities.drainTileIterator(source.tileIterator(
+        format=constants.TILE_FORMAT_PIL, scale={'magnification': 2}, resample=False),
+        checkUnresampledTile)
     assert tileCount == 144
     assert source.getTileCount(
         format=constants.TILE_FORMAT_PIL, scale={'magnification': 2}, resample=False) == 144
+
     # Check with a non-native magnfication with resampling
-    tileCount = 0
-    for tile in source.tileIterator(
-            format=constants.TILE_FORMAT_PIL, scale={'magnification': 2}, resample=True):
-        tileCount += 1
-        assert tile['tile'].size == (tile['width'], tile['height'])
+    def checkResampledTile(tile):
         assert tile['width'] == 256 if tile['level_x'] < 4 else 126
         assert tile['height'] == 256 if tile['level_y'] < 4 else 134
+        # Only decode the first tile and the partial tiles on the edges
+        if not tile['tile_position']['position'] or 4 in (tile['level_x'], tile['level_y']):
+            assert tile['tile'].size == (tile['width'], tile['height'])
+
+    tileCount = utilities.drainTileIterator(source.tileIterator(
+        format=constants.TILE_FORMAT_PIL, scale={'magnification': 2}, resample=True),
+        checkResampledTile)
     assert tileCount == 25
     assert source.getTileCount(
         format=constants.TILE_FORMAT_PIL, scale={'magnification': 2}, resample=True) == 25
     # Check that the default is with resampling
-    tileCount = len(list(source.tileIterator(
-        format=constants.TILE_FORMAT_PIL, scale={'magnification': 2})))
-    assert tileCount == 25
     assert source.getTileCount(
         format=constants.TILE_FORMAT_PIL, scale={'magnification': 2}) == 25
     # Asking for exact scale should result in no tiles.
     assert source.getTileCount(
         format=constants.TILE_FORMAT_PIL, scale={'magnification': 2, 'exact': True}) == 0
 
-    # Ask for numpy array as results
-    tileCount = 0
-    for tile in source.tileIterator(scale={'magnification': 5}):
-        tileCount += 1
+
+def testTileIteratorFormats(jp2kSvsSource):
+    source = jp2kSvsSource
+
+    # Ask for numpy array as results.  Check the corner tiles, which cover
+    # both the full and partial tile sizes in each direction.
+    assert source.getTileCount(scale={'magnification': 5}) == 144
+    for position in (0, 11, 72, 132, 143):
+        tile = source.getSingleTile(
+            scale={'magnification': 5}, format=constants.TILE_FORMAT_NUMPY,
+            tile_position=position)
         assert isinstance(tile['tile'], np.ndarray)
         assert tile['tile'].shape == (
             256 if tile['level_y'] < 11 else 79,
             256 if tile['level_x'] < 11 else 61,
             4)
         assert tile['tile'].dtype == np.dtype('uint8')
-    assert tileCount == 144
-    # Ask for either PIL or IMAGE data, we should get PIL data
-    tileCount = 0
-    for tile in source.tileIterator(
-            scale={'magnification': 5},
-            format=(constants.TILE_FORMAT_PIL,
-                    constants.TILE_FORMAT_IMAGE),
-            encoding='JPEG'):
-        tileCount += 1
+
+    # Ask for either PIL or IMAGE data, we should get PIL data.  The output
+    # type doesn't vary per tile, so check the first and last (edge) tiles.
+    params = dict(
+        scale={'magnification': 5},
+        format=(constants.TILE_FORMAT_PIL,
+                constants.TILE_FORMAT_IMAGE),
+        encoding='JPEG')
+    assert source.getTileCount(**params) == 144
+    for position in (0, 143):
+        tile = source.getSingleTile(tile_position=position, **params)
         assert isinstance(tile['tile'], PIL.Image.Image)
-    assert tileCount == 144
     # Ask for PNGs
-    tileCount = 0
-    for tile in source.tileIterator(
-            scale={'magnification': 5},
-            format=constants.TILE_FORMAT_IMAGE,
-            encoding='PNG'):
-        tileCount += 1
+    params = dict(
+        scale={'magnification': 5},
+        format=constants.TILE_FORMAT_IMAGE,
+        encoding='PNG')
+    assert source.getTileCount(**params) == 144
+    for position in (0, 143):
+        tile = source.getSingleTile(tile_position=position, **params)
         assert not isinstance(tile['tile'], PIL.Image.Image)
-        assert tile['tile'][:len(utilities.PNGHeader)] == utilities.PNGHeader
-    assert tileCount == 144
+        assert tile['tile'].startswith(utilities.PNGHeader)
 
 
-def testGetRegion():
-    imagePath = datastore.fetch(
-        'sample_jp2k_33003_TCGA-CV-7242-11A-01-TS1.1838afb1-9eee-'
-        '4a70-9ae3-50e3ab45e242.svs')
-    source = large_image_source_openslide.open(imagePath)
+def testTileNumpyZeroCopy(jp2kSvsSource):
+    tile = jp2kSvsSource.getSingleTile(
+        scale={'magnification': 5}, format=constants.TILE_FORMAT_NUMPY,
+        tile_position=0)
+    image = tile['tile']
+    assert image.dtype == np.uint8
+    # Converting a numpy tile again must not copy its pixels
+    assert np.asarray(image).ctypes.data == image.ctypes.data
+    assert _imageToNumpy(image)[0].ctypes.data == image.ctypes.data
+
+
+def testGetRegion(jp2kSvsSource):
+    source = jp2kSvsSource
     # By default, getRegion gets an image
     image, mimeType = source.getRegion(scale={'magnification': 2.5})
     assert mimeType == 'image/jpeg'
-    assert image[:len(utilities.JPEGHeader)] == utilities.JPEGHeader
+    assert image.startswith(utilities.JPEGHeader)
 
     # Adding a tile position request should be ignored
     image2, imageFormat = source.getRegion(scale={'magnification': 2.5},
@@ -211,11 +253,8 @@ def testGetRegion():
     assert image.height == 1447
 
 
-def testConvertRegionScale():
-    imagePath = datastore.fetch(
-        'sample_jp2k_33003_TCGA-CV-7242-11A-01-TS1.1838afb1-9eee-'
-        '4a70-9ae3-50e3ab45e242.svs')
-    source = large_image_source_openslide.open(imagePath)
+def testConvertRegionScale(jp2kSvsSource):
+    source = jp2kSvsSource
     # If we aren't using pixels as our units and don't specify a target
     # unit, this should do nothing.  This source image is 23021 x 23162
     sourceRegion = {'width': 0.8, 'height': 0.7, 'units': 'fraction'}
@@ -272,6 +311,17 @@ def testConvertRegionScale():
     assert int(targetRegion['height']) == 506
     assert targetRegion['units'] == 'mag_pixels'
 
+    # Several regions can be converted together
+    targetRegions = source.convertRegionScales(
+        [sourceRegion, {'width': 0.8, 'height': 0.7, 'units': 'fraction'}],
+        sourceScale, targetScale, targetUnits='fraction')
+    np.testing.assert_allclose(
+        [[region['width'], region['height']] for region in targetRegions],
+        [[0.8, 0.7], [0.8, 0.7]], rtol=1.0e-4)
+    assert [region['units'] for region in targetRegions] == ['fraction', 'fraction']
+    with pytest.raises(ValueError):
+        source.convertRegionScales([sourceRegion, {'units': 'unknown'}])
+
     # test getRegionAtAnotherScale
     image, imageFormat = source.getRegionAtAnotherScale(
         sourceRegion, sourceScale, targetScale,
@@ -297,11 +347,8 @@ def testConvertRegionScale():
             format=constants.TILE_FORMAT_NUMPY))
 
 
-def testConvertPointScale():
-    imagePath = datastore.fetch(
-        'sample_jp2k_33003_TCGA-CV-7242-11A-01-TS1.1838afb1-9eee-'
-        '4a70-9ae3-50e3ab45e242.svs')
-    source = large_image_source_openslide.open(imagePath)
+def testConvertPointScale(jp2kSvsSource):
+    source = jp2kSvsSource
     point = source.getPointAtAnotherScale((500, 800), {'magnification': 5}, 'mag_pixels')
     assert point == (4000.0, 6400.0)
     point = source.getPointAtAnotherScale(
@@ -313,10 +360,8 @@ def testConvertPointScale():
     assert point == (2000000.0, 3200.0)
 
 
-def testGetPixel():
-    imagePath = datastore.fetch(
-        'sample_jp2k_33003_TCGA-CV-7242-11A-01-TS1.1838afb1-9eee-'
-        '4a70-9ae3-50e3ab45e242.svs')
+def testGetPixel(jp2kSvsPath):
+    imagePath = jp2kSvsPath
     source = large_image_source_openslide.open(imagePath, style={'icc': False})
 
     pixel = source.getPixel(region={'left': 12125, 'top': 10640})
@@ -335,10 +380,8 @@ def testGetPixel():
     assert 'tile' in pixel
 
 
-def testGetPixelWithICCCorrection():
-    imagePath = datastore.fetch(
-        'sample_jp2k_33003_TCGA-CV-7242-11A-01-TS1.1838afb1-9eee-'
-        '4a70-9ae3-50e3ab45e242.svs')
+def testGetPixelWithICCCorrection(jp2kSvsPath):
+    imagePath = jp2kSvsPath
     source = large_image_source_openslide.open(imagePath)
     pixel = source.getPixel(region={'left': 12125, 'top': 10640})
     assert pixel == {'r': 169, 'g': 99, 'b': 151, 'a': 255, 'value': [169, 99, 151, 255]}
@@ -362,17 +405,15 @@ def testTilesFromPowerOf3Tiles():
     utilities.checkTilesZXY(source, tileMetadata)
 
 
-def testRegionsWithMagnification():
-    imagePath = datastore.fetch(
-        'sample_svs_image.TCGA-DU-6399-01A-01-TS1.e8eb65de-d63e-42db-'
-        'af6f-14fefbbdf7bd.svs')
+def testRegionsWithMagnification(svsPath):
+    imagePath = svsPath
     source = large_image_source_openslide.open(imagePath)
     params = {'region': {'width': 2000, 'height': 1500},
               'output': {'maxWidth': 1000, 'maxHeight': 1000},
               'encoding': 'PNG'}
     image, mimeType = source.getRegion(**params)
-    assert image[:len(utilities.PNGHeader)] == utilities.PNGHeader
-    (width, height) = struct.unpack('!LL', image[16:24])
+    assert image.startswith(utilities.PNGHeader)
+    (width, height) = utilities.pngSize(image)
     assert width == 1000
     assert height == 750
 
@@ -381,8 +422,8 @@ def testRegionsWithMagnification():
               'scale': {'magnification': 15},
               'encoding': 'PNG'}
     image, mimeType = source.getRegion(**params)
-    assert image[:len(utilities.PNGHeader)] == utilities.PNGHeader
-    (width, height) = struct.unpack('!LL', image[16:24])
+    assert image.startswith(utilities.PNGHeader)
+    (width, height) = utilities.pngSize(image)
     assert width == 750
     assert height == 562
 
@@ -397,21 +438,19 @@ def testRegionsWithMagnification():
               'scale': {'magnification': 10, 'exact': True},
               'encoding': 'PNG'}
     image, mimeType = source.getRegion(**params)
-    assert image[:len(utilities.PNGHeader)] == utilities.PNGHeader
-    (width, height) = struct.unpack('!LL', image[16:24])
+    assert image.startswith(utilities.PNGHeader)
+    (width, height) = utilities.pngSize(image)
     assert width == 500
     assert height == 375
 
 
-def testTilesAssociatedImages():
-    imagePath = datastore.fetch(
-        'sample_svs_image.TCGA-DU-6399-01A-01-TS1.e8eb65de-d63e-42db-'
-        'af6f-14fefbbdf7bd.svs')
+def testTilesAssociatedImages(svsPath):
+    imagePath = svsPath
     source = large_image_source_openslide.open(imagePath)
     imageList = source.getAssociatedImagesList()
     assert imageList == ['label', 'macro', 'thumbnail']
     image, mimeType = source.getAssociatedImage('macro')
-    assert image[:len(utilities.JPEGHeader)] == utilities.JPEGHeader
+    assert image.startswith(utilities.JPEGHeader)
     # Test missing associated image
     assert source.getAssociatedImage('nosuchimage') is None
 
@@ -430,49 +469,41 @@ def testTilesFromSmallFile():
     utilities.checkTilesZXY(source, tileMetadata)
 
 
-def testEdgeOptions():
-    imagePath = datastore.fetch(
-        'sample_svs_image.TCGA-DU-6399-01A-01-TS1.e8eb65de-d63e-42db-'
-        'af6f-14fefbbdf7bd.svs')
+def testEdgeOptions(svsPath):
+    imagePath = svsPath
     image = large_image_source_openslide.open(
         imagePath, format=constants.TILE_FORMAT_IMAGE, encoding='PNG',
         edge='crop').getTile(0, 0, 0)
-    assert image[:len(utilities.PNGHeader)] == utilities.PNGHeader
-    (width, height) = struct.unpack('!LL', image[16:24])
+    assert image.startswith(utilities.PNGHeader)
+    (width, height) = utilities.pngSize(image)
     assert width == 124
     assert height == 54
     image = large_image_source_openslide.open(
         imagePath, format=constants.TILE_FORMAT_IMAGE, encoding='PNG',
         edge='#DDD').getTile(0, 0, 0)
-    assert image[:len(utilities.PNGHeader)] == utilities.PNGHeader
-    (width, height) = struct.unpack('!LL', image[16:24])
+    assert image.startswith(utilities.PNGHeader)
+    (width, height) = utilities.pngSize(image)
     assert width == 240
     assert height == 240
     imageB = large_image_source_openslide.open(
         imagePath, format=constants.TILE_FORMAT_IMAGE, encoding='PNG',
         edge='yellow').getTile(0, 0, 0)
-    assert imageB[:len(utilities.PNGHeader)] == utilities.PNGHeader
-    (width, height) = struct.unpack('!LL', imageB[16:24])
+    assert imageB.startswith(utilities.PNGHeader)
+    (width, height) = utilities.pngSize(imageB)
     assert width == 240
     assert height == 240
     assert imageB != image
 
 
-def testInternalMetadata():
-    imagePath = datastore.fetch(
-        'sample_jp2k_33003_TCGA-CV-7242-11A-01-TS1.1838afb1-9eee-'
-        '4a70-9ae3-50e3ab45e242.svs')
-    source = large_image_source_openslide.open(imagePath)
+def testInternalMetadata(jp2kSvsSource):
+    source = jp2kSvsSource
     metadata = source.getInternalMetadata()
     assert 'openslide' in metadata
 
 
-def testICCIntents():
-    imagePath = datastore.fetch(
-        # 'sample_jp2k_33003_TCGA-CV-7242-11A-01-TS1.1838afb1-9eee-'
-        # '4a70-9ae3-50e3ab45e242.svs')
-        'sample_svs_image.TCGA-DU-6399-01A-01-TS1.e8eb65de-d63e-42db-'
-        'af6f-14fefbbdf7bd.svs')
+def testICCIntents(svsPath):
+    # jp2kSvsPath could also be used
+    imagePath = svsPath
     images = []
     for opt in {False, True, 'perceptual', 'relative_colorimetric',
                 'absolute_colorimetric', 'saturation'}:
@@ -4,7 +4,6 @@ import re
 import large_image_source_pil
 import pytest
 
-from large_image import config
 from large_image.cache_util import cachesClear
 
 from . import utilities
@@ -19,13 +18,13 @@ def testTilesFromPIL():
 
     imagePath = datastore.fetch('sample_Easy1.png')
     # Test with different max size options.
-    config.setConfig('max_small_image_size', 100)
-    assert large_image_source_pil.canRead(imagePath) is False
+    with utilities.configOverride('max_small_image_size', 100):
+        assert large_image_source_pil.canRead(imagePath) is False
 
     # Allow images bigger than our test
-    config.setConfig('max_small_image_size', 2048)
-    assert large_image_source_pil.canRead(imagePath) is True
-    source = large_image_source_pil.open(imagePath)
+    with utilities.configOverride('max_small_image_size', 2048):
+        assert large_image_source_pil.canRead(imagePath) is True
+        source = large_image_source_pil.open(imagePath)
     tileMetadata = source.getMetadata()
     assert tileMetadata['tileWidth'] == 1790
     assert tileMetadata['tileHeight'] == 1046
@@ -1,7 +1,7 @@
 import io
 import json
 import os
-import struct
+import types
 
 import large_image_source_tiff
 import numpy as np
@@ -14,6 +14,18 @@ from large_image.tilesource.utilities import ImageBytes
 from . import utilities
 from .datastore import datastore
 
+# Read-only region shared by the single tile tests
+SAMPLE_REGION = types.MappingProxyType({
+    'width': 0.7, 'height': 0.6,
+    'left': 0.15, 'top': 0.2,
+    'units': 'fraction'})
+
+
+@pytest.fixture(scope='module')
+def ptifSource():
+    # Tests that use this must not modify the source
+    return large_image_source_tiff.open(datastore.fetch('sample_image.ptif'))
+
 
 def nestedUpdate(value, nvalue):
     if not isinstance(value, dict) or not isinstance(nvalue, dict):
@@ -44,9 +56,8 @@ def testTilesFromPTIF():
     utilities.checkTilesZXY(source, tileMetadata)
 
 
-def testTileIterator():
-    imagePath = datastore.fetch('sample_image.ptif')
-    source = large_image_source_tiff.open(imagePath)
+def testTileIterator(ptifSource):
+    source = ptifSource
 
     # Ask for JPEGS
     tileCount = 0
@@ -55,7 +66,7 @@ def testTileIterator():
             format=constants.TILE_FORMAT_IMAGE,
             encoding='JPEG'):
         tileCount += 1
-        assert tile['tile'][:len(utilities.JPEGHeader)] == utilities.JPEGHeader
+        assert tile['tile'].startswith(utilities.JPEGHeader)
     assert tileCount == 45
     # Ask for PNGs
     tileCount = 0
@@ -64,7 +75,7 @@ def testTileIterator():
             format=constants.TILE_FORMAT_IMAGE,
             encoding='PNG'):
         tileCount += 1
-        assert tile['tile'][:len(utilities.PNGHeader)] == utilities.PNGHeader
+        assert tile['tile'].startswith(utilities.PNGHeader)
     assert tileCount == 45
     # Ask for TIFFS
     tileCount = 0
@@ -73,7 +84,7 @@ def testTileIterator():
             format=constants.TILE_FORMAT_IMAGE,
             encoding='TIFF'):
         tileCount += 1
-        assert tile['tile'][:len(utilities.TIFFHeader)] == utilities.TIFFHeader
+        assert tile['tile'].startswith(utilities.TIFFHeader)
     assert tileCount == 45
     # Ask for WEBPs
     tileCount = 0
@@ -86,6 +97,14 @@ def testTileIterator():
     assert tileCount == 45
 
 
+def testSourceIsShared(ptifSource):
+    imagePath = datastore.fetch('sample_image.ptif')
+    source1 = large_image_source_tiff.open(imagePath)
+    source2 = large_image_source_tiff.open(imagePath)
+    assert source1 is source2
+    assert source1.getMetadata() == ptifSource.getMetadata()
+
+
 def testTileIteratorRetiling():
     imagePath = datastore.fetch('sample_image.ptif')
     source = large_image_source_tiff.open(imagePath)
@@ -169,33 +188,24 @@ def testTileIteratorRetiling():
     assert tileCount == 60
 
 
-def testTileIteratorSingleTile():
-    imagePath = datastore.fetch('sample_image.ptif')
-    source = large_image_source_tiff.open(imagePath)
+def testTileIteratorSingleTile(ptifSource):
+    source = ptifSource
 
     # Test getting a single tile
-    sourceRegion = {
-        'width': 0.7, 'height': 0.6,
-        'left': 0.15, 'top': 0.2,
-        'units': 'fraction'}
+    sourceRegion = SAMPLE_REGION
     tileCount = 0
     for tile in source.tileIterator(
             region=sourceRegion,
             scale={'magnification': 5},
             tile_position=25):
         tileCount += 1
-        assert tile['tile_position']['position'] == 25
-        assert tile['tile_position']['level_x'] == 8
-        assert tile['tile_position']['level_y'] == 2
-        assert tile['tile_position']['region_x'] == 4
-        assert tile['tile_position']['region_y'] == 1
-        assert tile['iterator_range']['level_x_min'] == 4
-        assert tile['iterator_range']['level_y_min'] == 1
-        assert tile['iterator_range']['level_x_max'] == 25
-        assert tile['iterator_range']['level_y_max'] == 5
-        assert tile['iterator_range']['region_x_max'] == 21
-        assert tile['iterator_range']['region_y_max'] == 4
-        assert tile['iterator_range']['position'] == 84
+        assert tile['tile_position'] == {
+            'level_x': 8, 'level_y': 2,
+            'region_x': 4, 'region_y': 1, 'position': 25}
+        assert tile['iterator_range'] == {
+            'level_x_min': 4, 'level_y_min': 1,
+            'level_x_max': 25, 'level_y_max': 5,
+            'region_x_max': 21, 'region_y_max': 4, 'position': 84}
     assert tileCount == 1
     tiles = list(source.tileIterator(
         region=sourceRegion, scale={'magnification': 5},
@@ -218,45 +228,31 @@ def testTileIteratorSingleTile():
     assert len(tiles) == 0
 
 
-def testGetSingleTile():
-    imagePath = datastore.fetch('sample_image.ptif')
-    source = large_image_source_tiff.open(imagePath)
+def testGetSingleTile(ptifSource):
+    source = ptifSource
 
-    sourceRegion = {
-        'width': 0.7, 'height': 0.6,
-        'left': 0.15, 'top': 0.2,
-        'units': 'fraction'}
+    sourceRegion = SAMPLE_REGION
     sourceScale = {'magnification': 5}
     targetScale = {'magnification': 2.5}
     tile = source.getSingleTile(
         region=sourceRegion, scale=sourceScale, tile_position=25)
-    assert tile['tile_position']['position'] == 25
-    assert tile['tile_position']['level_x'] == 8
-    assert tile['tile_position']['level_y'] == 2
-    assert tile['tile_position']['region_x'] == 4
-    assert tile['tile_position']['region_y'] == 1
-    assert tile['iterator_range']['level_x_min'] == 4
-    assert tile['iterator_range']['level_y_min'] == 1
-    assert tile['iterator_range']['level_x_max'] == 25
-    assert tile['iterator_range']['level_y_max'] == 5
-    assert tile['iterator_range']['region_x_max'] == 21
-    assert tile['iterator_range']['region_y_max'] == 4
-    assert tile['iterator_range']['position'] == 84
+    assert tile['tile_position'] == {
+        'level_x': 8, 'level_y': 2,
+        'region_x': 4, 'region_y': 1, 'position': 25}
+    assert tile['iterator_range'] == {
+        'level_x_min': 4, 'level_y_min': 1,
+        'level_x_max': 25, 'level_y_max': 5,
+        'region_x_max': 21, 'region_y_max': 4, 'position': 84}
 
     tile = source.getSingleTileAtAnotherScale(
         sourceRegion, sourceScale, targetScale, tile_position=25)
-    assert tile['tile_position']['position'] == 25
-    assert tile['tile_position']['level_x'] == 5
-    assert tile['tile_position']['level_y'] == 2
-    assert tile['tile_position']['region_x'] == 3
-    assert tile['tile_position']['region_y'] == 2
-    assert tile['iterator_range']['level_x_min'] == 2
-    assert tile['iterator_range']['level_y_min'] == 0
-    assert tile['iterator_range']['level_x_max'] == 13
-    assert tile['iterator_range']['level_y_max'] == 3
-    assert tile['iterator_range']['region_x_max'] == 11
-    assert tile['iterator_range']['region_y_max'] == 3
-    assert tile['iterator_range']['position'] == 33
+    assert tile['tile_position'] == {
+        'level_x': 5, 'level_y': 2,
+        'region_x': 3, 'region_y': 2, 'position': 25}
+    assert tile['iterator_range'] == {
+        'level_x_min': 2, 'level_y_min': 0,
+        'level_x_max': 13, 'level_y_max': 3,
+        'region_x_max': 11, 'region_y_max': 3, 'position': 33}
 
 
 def testTilesFromPTIFJpeg2K():
@@ -278,29 +274,29 @@ def testThumbnails():
     tileMetadata = source.getMetadata()
     # Now we should be able to get a thumbnail
     image, mimeType = source.getThumbnail()
-    assert image[:len(utilities.JPEGHeader)] == utilities.JPEGHeader
+    assert image.startswith(utilities.JPEGHeader)
     defaultLength = len(image)
     image, mimeType = source.getThumbnail(encoding='PNG')
     assert isinstance(image, ImageBytes)
-    assert image[:len(utilities.PNGHeader)] == utilities.PNGHeader
+    assert image.startswith(utilities.PNGHeader)
     image, mimeType = source.getThumbnail(encoding='TIFF')
     assert isinstance(image, ImageBytes)
-    assert image[:len(utilities.TIFFHeader)] == utilities.TIFFHeader
+    assert image.startswith(utilities.TIFFHeader)
     image, mimeType = source.getThumbnail(jpegQuality=10)
     assert isinstance(image, ImageBytes)
-    assert image[:len(utilities.JPEGHeader)] == utilities.JPEGHeader
+    assert image.startswith(utilities.JPEGHeader)
     assert len(image) < defaultLength
     image, mimeType = source.getThumbnail(jpegSubsampling=2)
     assert isinstance(image, ImageBytes)
-    assert image[:len(utilities.JPEGHeader)] == utilities.JPEGHeader
+    assert image.startswith(utilities.JPEGHeader)
     assert len(image) < defaultLength
     with pytest.raises(Exception):
         source.getThumbnail(encoding='unknown')
     # Test width and height using PNGs
     image, mimeType = source.getThumbnail(encoding='PNG')
     assert isinstance(image, ImageBytes)
-    assert image[:len(utilities.PNGHeader)] == utilities.PNGHeader
-    (width, height) = struct.unpack('!LL', image[16:24])
+    assert image.startswith(utilities.PNGHeader)
+    (width, height) = utilities.pngSize(image)
     assert max(width, height) == 256
     # We know that we are using an example where the width is greater than
     # the height
@@ -309,37 +305,37 @@ def testThumbnails():
     origHeight = int(tileMetadata['sizeY'] *
                      2 ** -(tileMetadata['levels'] - 1))
     image, mimeType = source.getThumbnail(encoding='PNG', width=200)
-    assert image[:len(utilities.PNGHeader)] == utilities.PNGHeader
-    (width, height) = struct.unpack('!LL', image[16:24])
+    assert image.startswith(utilities.PNGHeader)
+    (width, height) = utilities.pngSize(image)
     assert width == 200
     assert height == int(width * origHeight / origWidth)
     image, mimeType = source.getThumbnail(encoding='PNG', height=200)
-    assert image[:len(utilities.PNGHeader)] == utilities.PNGHeader
-    (width, height) = struct.unpack('!LL', image[16:24])
+    assert image.startswith(utilities.PNGHeader)
+    (width, height) = utilities.pngSize(image)
     assert width == int(height * origWidth / origHeight)
     assert height == 200
     image, mimeType = source.getThumbnail(encoding='PNG', width=180, height=180)
-    assert image[:len(utilities.PNGHeader)] == utilities.PNGHeader
-    (width, height) = struct.unpack('!LL', image[16:24])
+    assert image.startswith(utilities.PNGHeader)
+    (width, height) = utilities.pngSize(image)
     assert width == 180
     assert height == int(width * origHeight / origWidth)
     # Test asking for fill values
     image, mimeType = source.getThumbnail(encoding='PNG', width=180, height=180, fill='none')
-    (width, height) = struct.unpack('!LL', image[16:24])
+    (width, height) = utilities.pngSize(image)
     assert width == 180
     assert height == int(width * origHeight / origWidth)
     image, mimeType = source.getThumbnail(encoding='PNG', width=180, height=180, fill='pink')
-    (width, height) = struct.unpack('!LL', image[16:24])
+    (width, height) = utilities.pngSize(image)
     assert width == 180
     assert height == 180
     nextimage, mimeType = source.getThumbnail(encoding='PNG', width=180, height=180, fill='#ffff00')
-    (width, height) = struct.unpack('!LL', nextimage[16:24])
+    (width, height) = utilities.pngSize(nextimage)
     assert width == 180
     assert height == 180
     assert image != nextimage
     nextimage, mimeType = source.getThumbnail(
         encoding='PNG', width=180, height=180, fill='corner:black')
-    (width, height) = struct.unpack('!LL', nextimage[16:24])
+    (width, height) = utilities.pngSize(nextimage)
     assert width == 180
     assert height == 180
     assert image != nextimage
@@ -397,10 +393,10 @@ def testRegions():
     params = {'region': {'width': 1000, 'height': 1000, 'left': 48000, 'top': 3000}}
     region = params['region']
     image, mimeType = source.getRegion(**params)
-    assert image[:len(utilities.JPEGHeader)] == utilities.JPEGHeader
+    assert image.startswith(utilities.JPEGHeader)
     origImage = image
     image, mimeType = source.getRegion(encoding='PNG', **params)
-    assert image[:len(utilities.PNGHeader)] == utilities.PNGHeader
+    assert image.startswith(utilities.PNGHeader)
     # Test using negative offsets
     region['left'] -= tileMetadata['sizeX']
     region['top'] -= tileMetadata['sizeY']
@@ -452,28 +448,28 @@ def testRegions():
               'output': {'maxWidth': 500, 'maxHeight': 500},
               'encoding': 'PNG'}
     image, mimeType = source.getRegion(**params)
-    assert image[:len(utilities.PNGHeader)] == utilities.PNGHeader
-    (width, height) = struct.unpack('!LL', image[16:24])
+    assert image.startswith(utilities.PNGHeader)
+    (width, height) = utilities.pngSize(image)
     assert width == 500
     assert height == 375
 
     # Test fill
     params['fill'] = 'none'
     image, mimeType = source.getRegion(**params)
-    assert image[:len(utilities.PNGHeader)] == utilities.PNGHeader
-    (width, height) = struct.unpack('!LL', image[16:24])
+    assert image.startswith(utilities.PNGHeader)
+    (width, height) = utilities.pngSize(image)
     assert width == 500
     assert height == 375
     params['fill'] = '#ff00ff'
     image, mimeType = source.getRegion(**params)
-    assert image[:len(utilities.PNGHeader)] == utilities.PNGHeader
-    (width, height) = struct.unpack('!LL', image[16:24])
+    assert image.startswith(utilities.PNGHeader)
+    (width, height) = utilities.pngSize(image)
     assert width == 500
     assert height == 500
     params['region']['width'] = 1500
     nextimage, mimeType = source.getRegion(**params)
-    assert nextimage[:len(utilities.PNGHeader)] == utilities.PNGHeader
-    (width, height) = struct.unpack('!LL', nextimage[16:24])
+    assert nextimage.startswith(utilities.PNGHeader)
+    (width, height) = utilities.pngSize(nextimage)
     assert width == 500
     assert height == 500
     assert image != nextimage
@@ -557,10 +553,10 @@ def testTilesAssociatedImages():
     imageList = source.getAssociatedImagesList()
     assert imageList == ['label', 'macro']
     image, mimeType = source.getAssociatedImage('label')
-    assert image[:len(utilities.JPEGHeader)] == utilities.JPEGHeader
+    assert image.startswith(utilities.JPEGHeader)
     image, mimeType = source.getAssociatedImage('label', encoding='PNG', width=256, height=256)
-    assert image[:len(utilities.PNGHeader)] == utilities.PNGHeader
-    (width, height) = struct.unpack('!LL', image[16:24])
+    assert image.startswith(utilities.PNGHeader)
+    (width, height) = utilities.pngSize(image)
     assert max(width, height) == 256
     # Test missing associated image
     assert source.getAssociatedImage('nosuchimage') is None
@@ -848,36 +844,36 @@ def testTileFrames():
 
     params = {'encoding': 'PNG', 'output': {'maxWidth': 200, 'maxHeight': 200}}
     image, mimeType = source.tileFrames(**params)
-    assert image[:len(utilities.PNGHeader)] == utilities.PNGHeader
-    (width, height) = struct.unpack('!LL', image[16:24])
+    assert image.startswith(utilities.PNGHeader)
+    (width, height) = utilities.pngSize(image)
     assert width == 400
     assert height == 382
 
     params['fill'] = 'corner:black'
     image, mimeType = source.tileFrames(**params)
-    assert image[:len(utilities.PNGHeader)] == utilities.PNGHeader
-    (width, height) = struct.unpack('!LL', image[16:24])
+    assert image.startswith(utilities.PNGHeader)
+    (width, height) = utilities.pngSize(image)
     assert width == 400
     assert height == 400
 
     params['framesAcross'] = 3
     image, mimeType = source.tileFrames(**params)
-    assert image[:len(utilities.PNGHeader)] == utilities.PNGHeader
-    (width, height) = struct.unpack('!LL', image[16:24])
+    assert image.startswith(utilities.PNGHeader)
+    (width, height) = utilities.pngSize(image)
     assert width == 600
     assert height == 200
 
     params['frameList'] = [0, 2]
     image, mimeType = source.tileFrames(**params)
-    assert image[:len(utilities.PNGHeader)] == utilities.PNGHeader
-    (width, height) = struct.unpack('!LL', image[16:24])
+    assert image.startswith(utilities.PNGHeader)
+    (width, height) = utilities.pngSize(image)
     assert width == 400
     assert height == 200
 
     params['frameList'] = [0]
     image, mimeType = source.tileFrames(**params)
-    assert image[:len(utilities.PNGHeader)] == utilities.PNGHeader
-    (width, height) = struct.unpack('!LL', image[16:24])
+    assert image.startswith(utilities.PNGHeader)
+    (width, height) = utilities.pngSize(image)
     assert width == 200
     assert height == 200
 
@@ -1,13 +1,31 @@
+import concurrent.futures
+import contextlib
 import math
+import struct
 
 import pytest
 
+from large_image import config
+
 JFIFHeader = b'\xff\xd8\xff\xe0\x00\x10JFIF'
 JPEGHeader = b'\xff\xd8\xff'
 PNGHeader = b'\x89PNG'
 TIFFHeader = b'II\x2a\x00'
 BigTIFFHeader = b'II\x2b\x00'
 
+# The width and height in a PNG's IHDR chunk
+_PNGSize = struct.Struct('!LL')
+
+
+def pngSize(image):
+    """
+    Get the size of a PNG image from its header.
+
+    :param image: the PNG image as bytes.
+    :returns: the width and height of the image.
+    """
+    return _PNGSize.unpack_from(image, 16)
+
 
 def checkTilesZXY(source, metadata, tileParams=None, imgHeader=JPEGHeader):
     """
@@ -34,7 +52,7 @@ def checkTilesZXY(source, metadata, tileParams=None, imgHeader=JPEGHeader):
         for (x, y) in ((0, 0), (maxX, 0), (0, maxY), (maxX, maxY)):
             try:
                 image = source.getTile(x, y, z, **tileParams)
-                assert image[:len(imgHeader)] == imgHeader
+                assert image.startswith(imgHeader)
             except Exception:
                 if not metadata.get('sparse') or z <= metadata['sparse']:
                     raise
@@ -55,3 +73,47 @@ def checkTilesZXY(source, metadata, tileParams=None, imgHeader=JPEGHeader):
     # Check too large z level
     with pytest.raises(Exception):
         source.getTile(0, 0, metadata['levels'], **tileParams)
+
+
+def drainTileIterator(iterator, checkFunc, workers=8):
+    """
+    Consume a tile iterator, checking each tile on a pool of threads.  Tile
+    images are loaded lazily, so the decoding happens in the worker threads.
+
+    :param iterator: a tile iterator.
+    :param checkFunc: a function that is called with each tile.  Unless
+        workers is 1, this is called concurrently, so any shared state it
+        modifies must be guarded.
+    :param workers: the number of worker threads.  If 1, tiles are checked
+        sequentially as they are produced.
+    :returns: the number of tiles.
+    """
+    if workers <= 1:
+        tileCount = 0
+        for tile in iterator:
+            checkFunc(tile)
+            tileCount += 1
+        return tileCount
+    with concurrent.futures.ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = [executor.submit(checkFunc, tile) for tile in iterator]
+        for future in concurrent.futures.as_completed(futures):
+            # Raise any assertion from the check
+            future.result()
+    return len(futures)
+
+
+@contextlib.contextmanager
+def configOverride(key, value):
+    """
+    Temporarily change a large_image config value, restoring the original
+    value on exit.  setConfig only changes the value if it differs.
+
+    :param key: the config key.
+    :param value: the value to use within the context.
+    """
+    original = config.getConfig(key)
+    config.setConfig(key, value)
+    try:
+        yield
+    finally:
+        config.setConfig(key, original)